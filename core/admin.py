@@ -8,6 +8,8 @@ from core.models import (
     Reservation,
     Actor,
     Genre,
+    SeatHold,
+    SlowRequest,
 )
 
 admin.site.register(Performance)
@@ -17,3 +19,24 @@ admin.site.register(TheatreHall)
 admin.site.register(Actor)
 admin.site.register(Genre)
 admin.site.register(Reservation)
+admin.site.register(SeatHold)
+
+
+@admin.register(SlowRequest)
+class SlowRequestAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "db_ms",
+    )
+    list_filter = ("route", "method")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
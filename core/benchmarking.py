@@ -0,0 +1,49 @@
+import math
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of ``values``, 0.0 when there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies) -> dict:
+    """Latency percentiles in milliseconds of timings in seconds."""
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+
+@contextmanager
+def throwaway_database(verbosity: int = 0):
+    """
+    Run the block against a freshly migrated test database that is
+    destroyed afterwards, never against the configured one.
+
+    SQLite test databases are put in a temporary file instead of shared
+    memory, so that worker threads wait on locks instead of failing.
+    """
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            test_settings["NAME"] = f"{directory}/throwaway.sqlite3"
+
+        old_name = connection.creation.create_test_db(
+            verbosity=verbosity,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity)
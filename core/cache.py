@@ -0,0 +1,235 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.fieldsets import FieldsetMixin
+
+VERSION_KEY = "core:version:{}"
+RESPONSE_KEY = "core:response:{}:{}"
+
+
+def _version_key(model) -> str:
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_model_versions(models) -> list:
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # Seeded from the clock rather than 1, so a version evicted
+            # from the cache never comes back as a value that older
+            # responses were stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def _bump_versions(models) -> None:
+    for model in models:
+        try:
+            cache.incr(_version_key(model))
+        except ValueError:
+            cache.add(_version_key(model), time.time_ns(), timeout=None)
+
+
+def invalidate_cached_responses(*models) -> None:
+    """
+    Bump the version of each model, orphaning every cached response
+    that depends on it without having to find and delete those keys.
+
+    Versions are bumped again once the surrounding transaction commits,
+    so a response cached from a read made before the commit can't
+    survive under the new version.
+    """
+    _bump_versions(models)
+    transaction.on_commit(lambda: _bump_versions(models))
+
+
+class ResponseModelsMixin:
+    """Declares the models a viewset's responses are built from."""
+
+    response_models = ()
+
+    def get_response_models(self):
+        return self.response_models
+
+    def get_cache_models(self) -> list:
+        """
+        The response models, plus the models of any relation the request
+        expands with ``?expand=``.
+        """
+        models = list(self.get_response_models())
+        if isinstance(self, FieldsetMixin):
+            models += [
+                model
+                for model in self.get_expanded_models()
+                if model not in models
+            ]
+        return models
+
+
+class CachedResponseMixin(ResponseModelsMixin):
+    """
+    Cache the serialized data of list and retrieve responses.
+
+    Keys include the current version of every model in
+    ``response_models``, which signal handlers bump on any write, so a
+    stale entry is simply never looked up again and expires on its own.
+    Changes that are not writes, like an expiring seat hold, end the
+    entry's timeout instead.
+    """
+
+    cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_cache_timeout(self) -> int:
+        next_change = get_next_change(self.get_cache_models())
+        if next_change is None:
+            return self.cache_timeout
+        seconds = (next_change - timezone.now()).total_seconds()
+        return max(1, min(self.cache_timeout, math.ceil(seconds)))
+
+    def get_cache_key(self, request) -> str:
+        versions = get_model_versions(self.get_cache_models())
+        fingerprint = hashlib.sha256(
+            "|".join(
+                [
+                    self.__class__.__name__,
+                    self.action,
+                    *map(str, versions),
+                    request.build_absolute_uri(),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+        return RESPONSE_KEY.format(self.basename, fingerprint)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.get_cache_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+def get_last_changes(models) -> tuple:
+    """
+    Fetch the latest ``updated_at`` of every model, plus any extra change
+    markers a model's queryset declares through ``change_markers()``,
+    in a single query of index-backed scalar subqueries.
+    """
+    markers = []
+    for model in models:
+        queryset = model.objects.all()
+        markers.append(
+            queryset.order_by("-updated_at").values("updated_at")[:1]
+        )
+        if hasattr(queryset, "change_markers"):
+            markers.extend(queryset.change_markers())
+
+    subqueries, params = [], []
+    for marker in markers:
+        sql, marker_params = marker.query.sql_with_params()
+        subqueries.append(f"({sql})")
+        params.extend(marker_params)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(subqueries)}", params)
+        return cursor.fetchone()
+
+
+def get_next_change(models):
+    """
+    The earliest upcoming change marker of ``models``, the next time
+    their data changes without a write, or None.
+    """
+    upcoming = []
+    for model in models:
+        queryset = model.objects.all()
+        if not hasattr(queryset, "change_markers"):
+            continue
+        for marker in queryset.change_markers():
+            upcoming.extend(
+                value for row in marker for value in row.values()
+            )
+    return min(upcoming, default=None)
+
+
+class ConditionalGetMixin(ResponseModelsMixin):
+    """
+    Answer list and retrieve requests carrying a matching If-None-Match
+    with 304 Not Modified, before the main queryset or serializer runs.
+
+    The ETag is derived from the last change time of every model in
+    ``response_models`` and their cache versions (which also move on
+    deletes), never from the rendered body.
+    """
+
+    def get_etag(self, request) -> str:
+        models = self.get_cache_models()
+        fingerprint = hashlib.sha256(
+            "|".join(
+                [
+                    self.__class__.__name__,
+                    self.action,
+                    str(request.user.pk),
+                    request.accepted_media_type or "",
+                    request.get_full_path(),
+                    *map(str, get_last_changes(models)),
+                    *map(str, get_model_versions(models)),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+        return quote_etag(fingerprint)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        not_modified = Response(
+            status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+        if etag in if_none_match:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        # "*" only matches a resource that exists, which is known once
+        # the view has found the object; a missing one stays a 404.
+        if "*" in if_none_match:
+            return not_modified
+        response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,24 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The request conflicts with the current state."
+    default_code = "conflict"
+
+
+class TicketAlreadyReserved(Conflict):
+    default_detail = "This ticket is already reserved."
+    default_code = "ticket_already_reserved"
+
+
+class SeatsUnavailable(Conflict):
+    default_detail = "Some of the requested seats are not available."
+    default_code = "seats_unavailable"
+
+    def __init__(self, unavailable):
+        super().__init__()
+        # Kept as-is rather than coerced to error strings, so clients get
+        # the same ticket ids and row/seat numbers they sent.
+        self.detail = {"detail": self.detail, "unavailable": unavailable}
@@ -0,0 +1,320 @@
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import SlugRelatedField
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def get_expandable_fields(serializer_class) -> dict:
+    """
+    Relation name -> nested serializer class of the relations of the
+    model a serializer can expand, declared in its ``expandable_fields``.
+    Classes may be given by name, looked up in the serializer's module.
+    """
+    module = sys.modules[serializer_class.__module__]
+    return {
+        name: getattr(module, nested) if isinstance(nested, str) else nested
+        for name, nested in getattr(
+            serializer_class, "expandable_fields", {}
+        ).items()
+    }
+
+
+def _split_param(request, name):
+    # A blank value is no value, not an empty selection.
+    value = request.query_params.get(name, "")
+    parts = [part.strip() for part in value.split(",") if part.strip()]
+    return parts or None
+
+
+def _is_many(model, name: str) -> bool:
+    field = model._meta.get_field(name)
+    return field.many_to_many or field.one_to_many
+
+
+def related_models(serializer, model) -> set:
+    """
+    The models a serializer reads rows of besides ``model``, following
+    the sources of its fields through relations and nested serializers.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    models = set()
+
+    for field in serializer._readable_fields:
+        if field.source == "*":
+            continue
+        attrs = list(field.source_attrs)
+        relation = getattr(field, "child_relation", field)
+        if type(relation) is SlugRelatedField:
+            attrs += relation.slug_field.replace("__", ".").split(".")
+
+        current = model
+        for attr in attrs:
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            current = model_field.related_model
+            models.add(current)
+        else:
+            if isinstance(field, serializers.BaseSerializer):
+                models |= related_models(field, current)
+
+    return models
+
+
+class Fieldset:
+    """
+    The shape a client asked for: the fields to keep (all when None) and
+    the relations to expand into nested objects.
+    """
+
+    def __init__(self, fields, expand: dict):
+        self.fields = fields
+        self.expand = expand
+
+    def shape(self, serializer) -> None:
+        """Expand and drop the fields of a serializer in place."""
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        model = serializer.Meta.model
+        fields = serializer.fields
+
+        for name, nested_class in self.expand.items():
+            if isinstance(fields.get(name), serializers.BaseSerializer):
+                continue
+            fields[name] = nested_class(
+                many=_is_many(model, name), read_only=True
+            )
+
+        if self.fields is not None:
+            for name in list(fields):
+                if name not in self.fields:
+                    del fields[name]
+
+    def apply(self, queryset, serializer, ordering=()):
+        """
+        Join and prefetch the relations the shaped serializer reads and,
+        when fields were picked, fetch only their columns.
+        """
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        needs = QueryNeeds(queryset)
+        needs.add_serializer(serializer, queryset.model)
+
+        kept, missing = needs.prefetch_lookups()
+        if not needs.complete:
+            # Something reads the whole instance, keep what the viewset
+            # fetches and only add what the expanded fields need.
+            if needs.select:
+                queryset = queryset.select_related(*needs.select)
+            return queryset.prefetch_related(*missing)
+
+        queryset = queryset.select_related(None)
+        if needs.select:
+            queryset = queryset.select_related(*needs.select)
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *kept, *missing
+        )
+
+        if self.fields is None:
+            return queryset
+        meta = queryset.model._meta
+        only = needs.only | {meta.pk.name} | {
+            meta.get_field(name).name for name in ordering
+        }
+        return queryset.only(*only)
+
+
+class QueryNeeds:
+    """
+    The columns, joins and prefetches a serializer reads from a queryset,
+    worked out from the ``source`` of its fields.
+    """
+
+    def __init__(self, queryset):
+        self.annotations = set(queryset.query.annotations)
+        self.existing_prefetches = queryset._prefetch_related_lookups
+        self.only = set()
+        self.select = set()
+        self.prefetch = set()
+        self.complete = True
+
+    def add_serializer(self, serializer, model, prefix="") -> None:
+        for field in serializer._readable_fields:
+            self.add_field(field, model, prefix)
+
+    def add_field(self, field, model, prefix) -> None:
+        if field.source == "*":
+            self.complete = False
+            return
+
+        attrs = list(field.source_attrs)
+        if type(field) is SlugRelatedField:
+            attrs += field.slug_field.replace("__", ".").split(".")
+
+        path = prefix
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # Annotations are fetched with the row, anything else
+                # (a property or method) may read any column.
+                annotation = not prefix and attr in self.annotations
+                if not (index == 0 and annotation):
+                    self.complete = False
+                return
+
+            path = f"{path}__{attr}" if path else attr
+            last = index == len(attrs) - 1
+
+            if model_field.many_to_many or model_field.one_to_many:
+                # Fetched in a query of its own, whatever it contains.
+                self.prefetch.add(path)
+                return
+            if not model_field.is_relation:
+                self.only.add(path)
+                return
+
+            if last and not isinstance(
+                field, (serializers.BaseSerializer, serializers.RelatedField)
+            ):
+                # A plain field over a relation renders str(instance).
+                self.select.add(path)
+                self.complete = False
+                return
+            if last and isinstance(field, serializers.RelatedField):
+                if type(field) is serializers.PrimaryKeyRelatedField:
+                    self.only.add(path)
+                else:
+                    self.select.add(path)
+                    self.complete = False
+                return
+
+            self.select.add(path)
+            model = model_field.related_model
+            if last:
+                self.add_serializer(field, model, path)
+
+    def prefetch_lookups(self) -> tuple:
+        """
+        The viewset's own prefetches that are still read, so custom
+        Prefetch querysets survive, and the prefetches still missing.
+        """
+        read = {path.split("__")[0] for path in self.prefetch}
+        kept, covered = [], set()
+        for lookup in self.existing_prefetches:
+            to = getattr(lookup, "prefetch_to", lookup)
+            covered.add(to)
+            if to.split("__")[0] in read:
+                kept.append(lookup)
+        return kept, sorted(self.prefetch - covered)
+
+
+class FieldsetMixin:
+    """
+    ``?fields=id,row,seat`` keeps only the listed fields of the list and
+    retrieve responses and fetches only their columns. ``?expand=`` turns
+    the relations named in the serializer's ``expandable_fields`` into
+    nested objects, joining or prefetching them as needed.
+    """
+
+    fieldset_actions = ("list", "retrieve")
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = self.build_fieldset()
+        return self._fieldset
+
+    def build_fieldset(self):
+        if self.action not in self.fieldset_actions:
+            return None
+        fields = _split_param(self.request, FIELDS_PARAM)
+        expand = _split_param(self.request, EXPAND_PARAM)
+        if fields is None and expand is None:
+            return None
+
+        serializer_class = self.get_serializer_class()
+        expandable = get_expandable_fields(serializer_class)
+        errors = {}
+
+        unknown = sorted(set(expand or ()) - set(expandable))
+        if unknown:
+            errors[EXPAND_PARAM] = (
+                f"Cannot expand {', '.join(unknown)}. Expandable: "
+                f"{', '.join(expandable) or 'none'}."
+            )
+        if fields is not None:
+            available = [
+                name
+                for name, field in serializer_class().fields.items()
+                if not field.write_only
+            ]
+            unknown = sorted(
+                set(fields) - set(available) - set(expandable)
+            )
+            if unknown:
+                errors[FIELDS_PARAM] = (
+                    f"Unknown fields {', '.join(unknown)}. "
+                    f"Available: {', '.join(available)}."
+                )
+        if errors:
+            raise ValidationError(errors)
+
+        return Fieldset(
+            fields,
+            {name: expandable[name] for name in expand or ()},
+        )
+
+    def get_expanded_models(self) -> list:
+        """
+        The models the relations expanded by the request read from, so
+        the response cache and ETags change with them too.
+        """
+        fieldset = self.get_fieldset()
+        if fieldset is None or not fieldset.expand:
+            return []
+
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context()
+        )
+        fieldset.shape(serializer)
+        return sorted(
+            related_models(serializer, serializer.Meta.model),
+            key=lambda model: model._meta.label,
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            fieldset.shape(serializer)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context()
+        )
+        fieldset.shape(serializer)
+        ordering = ()
+        if self.action == "list":
+            ordering = getattr(self.paginator, "ordering", ())
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+        return fieldset.apply(
+            queryset,
+            serializer,
+            [name.lstrip("-") for name in ordering],
+        )
@@ -0,0 +1,380 @@
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.benchmarking import throwaway_database
+from core.fast_list import FastListMixin
+from core.management.commands.seed_theatre import Command as SeedTheatre
+from core.models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Ticket,
+)
+from core.renderers import FastJSONRenderer
+from core.views import (
+    ActorViewSet,
+    PerformanceViewSet,
+    PlayViewSet,
+    TicketViewSet,
+)
+
+# name: (viewset, action) whose queryset and serializer are measured.
+BENCHMARKS = {
+    "performance-list": (PerformanceViewSet, "list"),
+    "ticket-list": (TicketViewSet, "list"),
+    "play-retrieve": (PlayViewSet, "retrieve"),
+    "actor-list": (ActorViewSet, "list"),
+}
+COMPARED = (
+    "queries",
+    "query_ms",
+    "serialize_us_per_object",
+    "render_us_per_object",
+    "query_peak_kib",
+    "serialize_peak_kib",
+)
+BATCH_SIZE = 5000
+
+
+def seed_rows(rows: int) -> None:
+    """
+    ``rows`` plays, performances, tickets and actors: ten halls of
+    10 x 10 seats, ten performances per play for a tenth of the plays,
+    a full house of tickets for the first performances and one play per
+    actor.
+    """
+    halls = TheatreHall.objects.bulk_create(
+        TheatreHall(name=f"Hall {number}", rows=10, seats_in_row=10)
+        for number in range(10)
+    )
+    genres = Genre.objects.bulk_create(
+        Genre(name=f"Genre {number}") for number in range(10)
+    )
+    plays = Play.objects.bulk_create(
+        (
+            Play(title=f"Play {number}", description="Benchmark play.")
+            for number in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    actors = Actor.objects.bulk_create(
+        (
+            Actor(first_name=f"First {number}", last_name=f"Last {number}")
+            for number in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Play.actors.through.objects.bulk_create(
+        (
+            Play.actors.through(play_id=play.id, actor_id=actor.id)
+            for play, actor in zip(plays, actors)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Play.genres.through.objects.bulk_create(
+        (
+            Play.genres.through(
+                play_id=play.id,
+                genre_id=genres[number % 10].id,
+            )
+            for number, play in enumerate(plays)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    now = timezone.now()
+    with_performances = max(rows // 10, 1)
+    performances = Performance.objects.bulk_create(
+        (
+            Performance(
+                play=plays[number % with_performances],
+                theatre_hall=halls[number % 10],
+                show_time=now + timedelta(hours=number),
+            )
+            for number in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Ticket.objects.bulk_create(
+        (
+            Ticket(
+                performance=performances[number // 100],
+                row=number % 100 // 10 + 1,
+                seat=number % 10 + 1,
+            )
+            for number in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark the hot viewset querysets and serializers at "
+        "several table sizes: query count, query time and peak memory "
+        "of fetching a page, and time and peak memory per serialized "
+        "object. --compare-rev runs the same benchmarks on another git "
+        "revision and prints the difference."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000",
+            help="Comma separated row counts, up to 1000000.",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100,
+            help="Objects fetched and serialized per measurement.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timings are the best of this many runs.",
+        )
+        parser.add_argument(
+            "--only",
+            choices=sorted(BENCHMARKS),
+            action="append",
+            help="Run only this benchmark, may be given more than once.",
+        )
+        parser.add_argument(
+            "--full-serializers",
+            action="store_true",
+            help="Serialize lists with the viewset serializers even where "
+                 "the values() fast path applies.",
+        )
+        parser.add_argument("--json", help="Also write the results here.")
+        parser.add_argument(
+            "--compare-rev",
+            help="Git revision to benchmark as well, from a temporary "
+                 "worktree, and compare against.",
+        )
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help="Use the configured database instead of a throwaway "
+                 "test database. Its theatre tables are emptied!",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes expects comma separated integers")
+        names = options["only"] or list(BENCHMARKS)
+        page_size, repeat = options["page_size"], options["repeat"]
+        self.fast_lists = not options["full_serializers"]
+
+        if options["current_db"]:
+            results = self.run(names, sizes, page_size, repeat)
+        else:
+            with throwaway_database(verbosity=options["verbosity"] - 1):
+                results = self.run(names, sizes, page_size, repeat)
+
+        self.print_results(results)
+        if options["json"]:
+            Path(options["json"]).write_text(json.dumps(results, indent=2))
+
+        if options["compare_rev"]:
+            other = self.run_revision(options["compare_rev"], options)
+            self.print_comparison(options["compare_rev"], other, results)
+
+    def run(self, names, sizes, page_size, repeat) -> dict:
+        results = {name: {} for name in names}
+        for size in sizes:
+            SeedTheatre().flush()
+            seed_rows(size)
+            for name in names:
+                results[name][str(size)] = self.measure(
+                    *BENCHMARKS[name], page_size, repeat
+                )
+        SeedTheatre().flush()
+        return results
+
+    @staticmethod
+    def get_view(viewset, action, page_size):
+        # Pagination links are absolute, so the host has to be allowed.
+        hosts = [host for host in settings.ALLOWED_HOSTS if host[0] not in ".*"]
+        request = APIRequestFactory().get(
+            "/",
+            {"page_size": page_size},
+            HTTP_HOST=hosts[0] if hosts else "localhost",
+        )
+        view = viewset(
+            action=action,
+            request=Request(request),
+            format_kwarg=None,
+            kwargs={},
+        )
+        if action == "retrieve":
+            view.kwargs["pk"] = Play.objects.order_by("id").first().pk
+        return view
+
+    def get_fast_list(self, view):
+        if self.fast_lists and isinstance(view, FastListMixin):
+            return view.get_fast_list()
+        return None
+
+    def fetch(self, view) -> list:
+        if view.action == "retrieve":
+            return [view.get_object()]
+        fast_list = self.get_fast_list(view)
+        if fast_list is not None:
+            queryset = view.get_fast_list_queryset(fast_list)
+        else:
+            queryset = view.filter_queryset(view.get_queryset())
+        return view.paginate_queryset(queryset)
+
+    def serialize(self, view, page) -> list:
+        # The fast path runs its query for many related fields here.
+        fast_list = self.get_fast_list(view)
+        if fast_list is not None:
+            return fast_list.serialize(page)
+        return view.get_serializer(page, many=True).data
+
+    def measure(self, viewset, action, page_size, repeat) -> dict:
+        query_times, serialize_times = [], []
+        render_times = {FastJSONRenderer: [], JSONRenderer: []}
+        for _ in range(repeat):
+            view = self.get_view(viewset, action, page_size)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                page = self.fetch(view)
+                query_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            data = self.serialize(view, page)
+            serialize_times.append(time.perf_counter() - started)
+
+            for renderer, times in render_times.items():
+                started = time.perf_counter()
+                renderer().render(data)
+                times.append(time.perf_counter() - started)
+
+        # Allocations are traced in a separate pass, tracing slows
+        # Python down too much to time the same run.
+        view = self.get_view(viewset, action, page_size)
+        tracemalloc.start()
+        page = self.fetch(view)
+        query_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        self.serialize(view, page)
+        serialize_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        objects = max(len(page), 1)
+        return {
+            "objects": len(page),
+            "queries": len(queries),
+            "query_ms": round(min(query_times) * 1000, 3),
+            "serialize_us_per_object": round(
+                min(serialize_times) / objects * 1_000_000, 2
+            ),
+            # FastJSONRenderer, and the stdlib JSONRenderer it replaces.
+            "render_us_per_object": round(
+                min(render_times[FastJSONRenderer]) / objects * 1_000_000, 2
+            ),
+            "json_render_us_per_object": round(
+                min(render_times[JSONRenderer]) / objects * 1_000_000, 2
+            ),
+            "query_peak_kib": round(query_peak / 1024, 1),
+            "serialize_peak_kib": round(serialize_peak / 1024, 1),
+        }
+
+    def run_revision(self, revision, options) -> dict:
+        with tempfile.TemporaryDirectory() as directory:
+            worktree = Path(directory) / "tree"
+            output = Path(directory) / "results.json"
+            git = ["git", "-C", str(settings.BASE_DIR)]
+            subprocess.run(
+                [*git, "worktree", "add", "--detach", str(worktree), revision],
+                check=True,
+                capture_output=True,
+            )
+            try:
+                command = [
+                    sys.executable,
+                    "manage.py",
+                    "benchmark_serializers",
+                    "--sizes", options["sizes"],
+                    "--page-size", str(options["page_size"]),
+                    "--repeat", str(options["repeat"]),
+                    "--json", str(output),
+                ]
+                for name in options["only"] or ():
+                    command += ["--only", name]
+                if options["full_serializers"]:
+                    command.append("--full-serializers")
+                process = subprocess.run(
+                    command,
+                    cwd=worktree,
+                    capture_output=True,
+                    text=True,
+                )
+                if process.returncode:
+                    raise CommandError(
+                        f"Benchmarks failed on {revision}:\n{process.stderr}"
+                    )
+                return json.loads(output.read_text())
+            finally:
+                subprocess.run(
+                    [*git, "worktree", "remove", "--force", str(worktree)],
+                    capture_output=True,
+                )
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'benchmark':<18}{'rows':>9}{'queries':>9}{'query ms':>10}"
+            f"{'us/object':>11}{'render us':>11}{'json us':>9}"
+            f"{'query KiB':>11}{'ser. KiB':>10}"
+        )
+        for name, sizes in results.items():
+            for size, result in sizes.items():
+                self.stdout.write(
+                    f"{name:<18}{size:>9}{result['queries']:>9}"
+                    f"{result['query_ms']:>10}"
+                    f"{result['serialize_us_per_object']:>11}"
+                    f"{result['render_us_per_object']:>11}"
+                    f"{result['json_render_us_per_object']:>9}"
+                    f"{result['query_peak_kib']:>11}"
+                    f"{result['serialize_peak_kib']:>10}"
+                )
+
+    def print_comparison(self, revision, other, results):
+        self.stdout.write(f"\nChange against {revision}:")
+        for name, sizes in results.items():
+            for size, result in sizes.items():
+                before = other.get(name, {}).get(size)
+                if before is None:
+                    continue
+                changes = []
+                for key in COMPARED:
+                    if key not in before:
+                        continue
+                    if before[key]:
+                        change = (result[key] / before[key] - 1) * 100
+                        changes.append(f"{key} {change:+.1f}%")
+                    else:
+                        changes.append(f"{key} {before[key]} -> {result[key]}")
+                self.stdout.write(f"{name} @ {size}: {', '.join(changes)}")
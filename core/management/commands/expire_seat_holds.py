@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired seat holds in bulk. Expired holds never block "
+        "seats, so run this periodically (e.g. from cron) to keep the "
+        "hold table small."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = SeatHold.objects.expired().delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired seat holds")
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Performance
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a ticket for every seat of the hall of the given "
+        "performances. Seats that already have a ticket are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("performance_ids", nargs="+", type=int)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of tickets inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        performances = Performance.objects.select_related(
+            "theatre_hall"
+        ).filter(id__in=options["performance_ids"])
+
+        missing = set(options["performance_ids"]) - {
+            performance.id for performance in performances
+        }
+        if missing:
+            raise CommandError(
+                f"Performance(s) not found: {', '.join(map(str, sorted(missing)))}"
+            )
+
+        for performance in performances:
+            created = performance.generate_tickets(
+                batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Performance #{performance.id}: created {created} tickets"
+                )
+            )
@@ -0,0 +1,365 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import latency_summary
+
+DEFAULT_BASELINE = settings.BASE_DIR / "benchmarks" / "loadtest_baseline.json"
+
+# Relative weight of every step in the traffic mix.
+SCENARIO = (
+    ("plays", 20),
+    ("play", 15),
+    ("performances", 20),
+    ("tickets", 15),
+    ("reserve", 10),
+    ("reservations", 15),
+    ("refresh", 5),
+)
+
+
+# Another virtual user reserving the ticket first is part of the mix.
+CONFLICT_STATUSES = {"reserve": (400, 409)}
+
+
+def is_error(status) -> bool:
+    """
+    Transport failures, server errors and throttling (429): a throttled
+    run measures the throttle, not the server.
+    """
+    return status == "error" or status == 429 or status >= 500
+
+
+def is_conflict(name, status) -> bool:
+    return status in CONFLICT_STATUSES.get(name, ())
+
+
+class VirtualUser:
+    """
+    One client of the traffic mix, with its own keep-alive connection,
+    JWT pair and what it has seen so far (plays, dates, tickets), which
+    later steps pick from the way a browsing customer would.
+    """
+
+    def __init__(self, base_url, username, password, rng, record):
+        url = urlsplit(base_url)
+        connection_class = (
+            HTTPSConnection if url.scheme == "https" else HTTPConnection
+        )
+        self.connection = connection_class(url.netloc, timeout=30)
+        self.username = username
+        self.password = password
+        self.rng = rng
+        self.record = record
+        self.access = self.refresh_token = None
+        self.play_ids, self.dates = [], []
+        self.performance_ids, self.ticket_ids = [], []
+
+    def request(self, name, method, path, body=None):
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(body)
+        if self.access:
+            headers["Authorization"] = f"Bearer {self.access}"
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, HTTPException):
+            self.connection.close()
+            payload, status = b"", "error"
+        self.record(name, status, time.perf_counter() - started)
+
+        if isinstance(status, int) and status < 300 and payload:
+            return json.loads(payload)
+        return None
+
+    def login(self):
+        data = self.request(
+            "token",
+            "POST",
+            "/api/user/token/",
+            {"username": self.username, "password": self.password},
+        )
+        if data is None:
+            raise CommandError(f"Could not log in as {self.username}")
+        self.access, self.refresh_token = data["access"], data["refresh"]
+
+    def step(self, name):
+        getattr(self, f"step_{name}")()
+
+    def step_plays(self):
+        data = self.request("plays", "GET", "/theatre/api/plays/")
+        if data:
+            self.play_ids = [play["id"] for play in data["results"]]
+
+    def step_play(self):
+        if not self.play_ids:
+            return self.step_plays()
+        play_id = self.rng.choice(self.play_ids)
+        self.request("play", "GET", f"/theatre/api/plays/{play_id}/")
+
+    def step_performances(self):
+        params = {}
+        if self.dates:
+            params["date"] = self.rng.choice(self.dates)
+        data = self.request(
+            "performances",
+            "GET",
+            f"/theatre/api/performances/?{urlencode(params)}",
+        )
+        if data:
+            performances = data["results"]
+            self.performance_ids = [item["id"] for item in performances]
+            self.dates = self.dates or [
+                item["show_time"][:10] for item in performances
+            ]
+
+    def step_tickets(self):
+        if not self.performance_ids:
+            return self.step_performances()
+        performance_id = self.rng.choice(self.performance_ids)
+        data = self.request(
+            "tickets",
+            "GET",
+            f"/theatre/api/tickets/?performance={performance_id}",
+        )
+        if data:
+            self.ticket_ids = [ticket["id"] for ticket in data["results"]]
+
+    def step_reserve(self):
+        if not self.ticket_ids:
+            return self.step_tickets()
+        index = self.rng.randrange(len(self.ticket_ids))
+        ticket_id = self.ticket_ids.pop(index)
+        self.request(
+            "reserve",
+            "POST",
+            "/theatre/api/reservations/",
+            {"ticket": ticket_id},
+        )
+
+    def step_reservations(self):
+        self.request("reservations", "GET", "/theatre/api/reservations/")
+
+    def step_refresh(self):
+        data = self.request(
+            "refresh",
+            "POST",
+            "/api/user/token/refresh/",
+            {"refresh": self.refresh_token},
+        )
+        if data:
+            self.access = data["access"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the production traffic mix (browse plays, open one, list "
+        "performances by date, fetch tickets, reserve, list reservations, "
+        "refresh the JWT) against a running server from concurrent "
+        "virtual users. Reports throughput and latency per endpoint and "
+        "fails when they regress against the committed baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server under test.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10,
+            help="Number of concurrent virtual users.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Seconds to run for.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=None,
+            help="Steps per virtual user, instead of --duration.",
+        )
+        parser.add_argument(
+            "--username",
+            default="seed-0-user-{}",
+            help="Account name pattern, filled with 1..--accounts. "
+                 "Matches the users of 'seed_theatre --seed 0'.",
+        )
+        parser.add_argument("--accounts", type=int, default=100)
+        parser.add_argument("--password", default="seed-1-2-3")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed slowdown of p95/p99 and drop of throughput "
+                 "against the baseline, as a fraction.",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results as the new baseline instead of "
+                 "comparing against it.",
+        )
+
+    def handle(self, *args, **options):
+        report = self.run(**options)
+        self.print_report(report)
+
+        if options["save_baseline"]:
+            with open(options["baseline"], "w") as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write("\n")
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        try:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            self.stdout.write(
+                self.style.WARNING(f"No baseline at {options['baseline']}")
+            )
+            return
+
+        regressions = self.compare(report, baseline, options["tolerance"])
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) against the baseline"
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def run(self, url, users, duration, iterations, seed, **options) -> dict:
+        samples = defaultdict(list)
+        lock = threading.Lock()
+
+        def record(name, status, elapsed):
+            with lock:
+                samples[name].append((status, elapsed))
+
+        clients = [
+            VirtualUser(
+                url,
+                options["username"].format(index % options["accounts"] + 1),
+                options["password"],
+                random.Random(f"{seed}-{index}"),
+                record,
+            )
+            for index in range(users)
+        ]
+        for client in clients:
+            client.login()
+
+        names = [name for name, weight in SCENARIO]
+        weights = [weight for name, weight in SCENARIO]
+        deadline = time.perf_counter() + duration
+
+        def finished(steps: int) -> bool:
+            if iterations is not None:
+                return steps >= iterations
+            return time.perf_counter() >= deadline
+
+        def drive(client):
+            steps = 0
+            while not finished(steps):
+                client.step(client.rng.choices(names, weights)[0])
+                steps += 1
+            client.connection.close()
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=drive, args=(client,))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        samples.pop("token", None)
+        endpoints = {}
+        for name, results in sorted(samples.items()):
+            errors = sum(1 for status, _ in results if is_error(status))
+            conflicts = sum(
+                1 for status, _ in results if is_conflict(name, status)
+            )
+            endpoints[name] = {
+                "requests": len(results),
+                "errors": errors,
+                "conflicts": conflicts,
+                "rps": round(len(results) / elapsed, 2),
+                **latency_summary([latency for _, latency in results]),
+            }
+
+        return {
+            "users": users,
+            "seconds": round(elapsed, 1),
+            "rps": round(
+                sum(item["requests"] for item in endpoints.values()) / elapsed,
+                2,
+            ),
+            "endpoints": endpoints,
+        }
+
+    @staticmethod
+    def compare(report, baseline, tolerance) -> list:
+        regressions = []
+        for name, result in report["endpoints"].items():
+            if result["errors"]:
+                regressions.append(f"{name}: {result['errors']} error(s)")
+
+            expected = baseline["endpoints"].get(name)
+            if expected is None:
+                continue
+            for key in ("p95_ms", "p99_ms"):
+                if result[key] > expected[key] * (1 + tolerance):
+                    regressions.append(
+                        f"{name}: {key} {result[key]} "
+                        f"(baseline {expected[key]})"
+                    )
+
+        if report["rps"] < baseline["rps"] * (1 - tolerance):
+            regressions.append(
+                f"throughput {report['rps']} rps "
+                f"(baseline {baseline['rps']})"
+            )
+        return regressions
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['users']} users, {report['seconds']} s, "
+            f"{report['rps']} requests/s"
+        )
+        self.stdout.write(
+            f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'conflicts':>10}"
+            f"{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for name, result in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:<14}{result['requests']:>9}{result['errors']:>8}"
+                f"{result['conflicts']:>10}"
+                f"{result['rps']:>9}{result['p50_ms']:>9}"
+                f"{result['p95_ms']:>9}{result['p99_ms']:>9}"
+            )
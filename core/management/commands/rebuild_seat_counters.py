@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from core.cache import invalidate_cached_responses
+from core.models import Performance, Reservation, Ticket
+
+
+def reserved_seats_subquery():
+    return Coalesce(
+        Subquery(
+            Reservation.objects.filter(ticket__performance=OuterRef("pk"))
+            .values("ticket__performance")
+            .annotate(reserved=Count("id"))
+            .values("reserved")
+        ),
+        0,
+    )
+
+
+def is_reserved_subquery():
+    return Exists(Reservation.objects.filter(ticket=OuterRef("pk")))
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the stored reserved seat counters of performances and "
+        "the is_reserved flags of tickets from the reservation table, "
+        "or only report drift with --check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report performances whose counter is out of date "
+                 "without changing them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            self.check_counters()
+        else:
+            self.rebuild_counters()
+
+    def check_counters(self):
+        drifted = (
+            Performance.objects.annotate(actual=reserved_seats_subquery())
+            .exclude(reserved_seats=F("actual"))
+            .values_list("id", "reserved_seats", "actual")
+        )
+        drifted = list(drifted)
+
+        for performance_id, stored, actual in drifted:
+            self.stdout.write(
+                f"Performance #{performance_id}: "
+                f"stored {stored}, actual {actual}"
+            )
+
+        drifted_tickets = list(
+            Ticket.objects.annotate(actual=is_reserved_subquery())
+            .exclude(is_reserved=F("actual"))
+            .values_list("id", "is_reserved")
+        )
+
+        for ticket_id, stored in drifted_tickets:
+            self.stdout.write(
+                f"Ticket #{ticket_id}: "
+                f"stored is_reserved={stored}, actual {not stored}"
+            )
+
+        if drifted or drifted_tickets:
+            raise CommandError(
+                f"{len(drifted)} performance counter(s) and "
+                f"{len(drifted_tickets)} ticket flag(s) out of date"
+            )
+        self.stdout.write(self.style.SUCCESS("All seat counters are correct"))
+
+    def rebuild_counters(self):
+        with transaction.atomic():
+            updated = Performance.objects.update(
+                reserved_seats=reserved_seats_subquery(),
+                updated_at=Now(),
+            )
+            flagged = (
+                Ticket.objects.annotate(actual=is_reserved_subquery())
+                .exclude(is_reserved=F("actual"))
+                .update(is_reserved=is_reserved_subquery(), updated_at=Now())
+            )
+        invalidate_cached_responses(Performance, Ticket)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt seat counters for {updated} performances "
+                f"and fixed {flagged} ticket flags"
+            )
+        )
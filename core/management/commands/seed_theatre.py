@@ -0,0 +1,290 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.cache import invalidate_cached_responses
+from core.models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Ticket,
+    Reservation,
+    SeatHold,
+)
+
+GENRES = (
+    "Drama", "Comedy", "Tragedy", "Musical", "Opera", "Ballet",
+    "Farce", "Satire", "Melodrama", "Mystery", "Fantasy", "Documentary",
+)
+SEED_PASSWORD = "seed-1-2-3"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic theatre: plays, actors, "
+        "genres, halls, performances, a ticket for every seat and "
+        "reservations for a share of them. The data only depends on "
+        "--seed and --start-date, so benchmark runs are comparable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plays", type=int, default=50)
+        parser.add_argument("--halls", type=int, default=5)
+        parser.add_argument(
+            "--performances-per-play",
+            type=int,
+            default=10,
+        )
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.7,
+            help="Share of the tickets of each performance that is reserved.",
+        )
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            default=None,
+            help="First day of the performances as YYYY-MM-DD, today "
+                 "by default. They span the following 60 days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows inserted per query.",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete every theatre, ticket and reservation first.",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["occupancy"] <= 1:
+            raise CommandError("--occupancy must be between 0 and 1")
+        if options["users"] < 1 and options["occupancy"] > 0:
+            raise CommandError("Reservations need at least one --users")
+
+        self.seed = options["seed"]
+        self.rng = random.Random(self.seed)
+        self.prefix = f"Seed {self.seed}"
+        self.batch_size = options["batch_size"]
+        start_date = options["start_date"] or timezone.localdate()
+
+        with transaction.atomic():
+            if options["flush"]:
+                self.flush()
+            elif Genre.objects.filter(name__startswith=self.prefix).exists():
+                raise CommandError(
+                    f"Seed {self.seed} is already loaded, "
+                    f"use another --seed or --flush"
+                )
+
+            users = self.create_users(options["users"])
+            plays = self.create_plays(options["plays"])
+            halls = self.create_halls(options["halls"])
+            counts = self.create_performances(
+                plays,
+                halls,
+                users,
+                options["performances_per_play"],
+                options["occupancy"],
+                start_date,
+            )
+
+        invalidate_cached_responses(
+            Actor, Genre, Play, TheatreHall, Performance, Ticket, Reservation
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(users)} users, {len(plays)} plays, "
+                f"{len(halls)} halls, {counts['performances']} performances, "
+                f"{counts['tickets']} tickets and "
+                f"{counts['reservations']} reservations"
+            )
+        )
+
+    def flush(self):
+        # Truncated like the flush command does, without a delete signal
+        # per reservation adjusting counters that are going away anyway.
+        models = (
+            Reservation, SeatHold, Ticket, Performance, Play.actors.through,
+            Play.genres.through, Play, Actor, Genre, TheatreHall,
+        )
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(
+                no_style(),
+                [model._meta.db_table for model in models],
+            )
+        )
+        get_user_model().objects.filter(
+            username__startswith="seed-", is_staff=False
+        ).delete()
+
+    def create_users(self, count: int) -> list:
+        # Hashing is slow on purpose, so every user shares one hash.
+        password = make_password(SEED_PASSWORD)
+        user_model = get_user_model()
+        return user_model.objects.bulk_create(
+            (
+                user_model(
+                    username=f"seed-{self.seed}-user-{number}",
+                    password=password,
+                )
+                for number in range(1, count + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_plays(self, count: int) -> list:
+        genres = Genre.objects.bulk_create(
+            Genre(name=f"{self.prefix} {name}") for name in GENRES
+        )
+        actors = Actor.objects.bulk_create(
+            (
+                Actor(
+                    first_name=f"{self.prefix} First {number}",
+                    last_name=f"{self.prefix} Last {number}",
+                )
+                for number in range(1, max(count * 2, 1) + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+        plays = Play.objects.bulk_create(
+            (
+                Play(
+                    title=f"{self.prefix} Play {number}",
+                    description=f"Synthetic play number {number}.",
+                )
+                for number in range(1, count + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+
+        play_actors, play_genres = [], []
+        for play in plays:
+            play_actors.extend(
+                Play.actors.through(play_id=play.id, actor_id=actor.id)
+                for actor in self.rng.sample(actors, min(len(actors), 4))
+            )
+            play_genres.extend(
+                Play.genres.through(play_id=play.id, genre_id=genre.id)
+                for genre in self.rng.sample(genres, self.rng.randint(1, 3))
+            )
+        Play.actors.through.objects.bulk_create(
+            play_actors, batch_size=self.batch_size
+        )
+        Play.genres.through.objects.bulk_create(
+            play_genres, batch_size=self.batch_size
+        )
+        return plays
+
+    def create_halls(self, count: int) -> list:
+        return TheatreHall.objects.bulk_create(
+            TheatreHall(
+                name=f"{self.prefix} Hall {number}",
+                rows=self.rng.randint(5, 25),
+                seats_in_row=self.rng.randint(8, 30),
+            )
+            for number in range(1, count + 1)
+        )
+
+    def create_performances(
+        self,
+        plays,
+        halls,
+        users,
+        per_play: int,
+        occupancy: float,
+        start_date: date,
+    ) -> dict:
+        """
+        Plan every performance and its reserved seats up front, so the
+        stored counters and ticket flags are inserted already correct
+        instead of being fixed by a pass over the tickets afterwards.
+        """
+        plans = []
+        for play in plays:
+            for _ in range(per_play):
+                hall = self.rng.choice(halls)
+                day = start_date + timedelta(days=self.rng.randrange(60))
+                capacity = hall.rows * hall.seats_in_row
+                plans.append(
+                    (
+                        Performance(
+                            play=play,
+                            theatre_hall=hall,
+                            show_time=timezone.make_aware(
+                                datetime.combine(
+                                    day, time(self.rng.randint(12, 21))
+                                )
+                            ),
+                            reserved_seats=round(capacity * occupancy),
+                        ),
+                        hall,
+                    )
+                )
+
+        performances = Performance.objects.bulk_create(
+            (performance for performance, hall in plans),
+            batch_size=self.batch_size,
+        )
+
+        counts = {
+            "performances": len(performances),
+            "tickets": 0,
+            "reservations": 0,
+        }
+        pending = []
+        for performance, hall in plans:
+            capacity = hall.rows * hall.seats_in_row
+            reserved = set(
+                self.rng.sample(range(capacity), performance.reserved_seats)
+            )
+            for index in range(capacity):
+                row, seat = divmod(index, hall.seats_in_row)
+                user = self.rng.choice(users) if index in reserved else None
+                pending.append(
+                    (
+                        Ticket(
+                            performance=performance,
+                            row=row + 1,
+                            seat=seat + 1,
+                            is_reserved=user is not None,
+                        ),
+                        user,
+                    )
+                )
+            if len(pending) >= self.batch_size:
+                self.insert_tickets(pending, counts)
+                pending = []
+
+        self.insert_tickets(pending, counts)
+        return counts
+
+    def insert_tickets(self, pending, counts: dict) -> None:
+        tickets = Ticket.objects.bulk_create(
+            (ticket for ticket, user in pending),
+            batch_size=self.batch_size,
+        )
+        reservations = Reservation.objects.bulk_create(
+            (
+                Reservation(ticket_id=ticket.id, user_id=user.id)
+                for ticket, user in pending
+                if user is not None
+            ),
+            batch_size=self.batch_size,
+        )
+        counts["tickets"] += len(tickets)
+        counts["reservations"] += len(reservations)
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+from collections import Counter
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmarking import latency_summary, throwaway_database
+from core.management.commands.rebuild_seat_counters import (
+    Command as RebuildSeatCounters,
+)
+from core.models import Reservation
+from core.tests.config_for_tests import (
+    create_sample_performance,
+    create_sample_theatre,
+)
+from core.views import ReservationViewSet
+
+LOCKING_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer reservation creation from concurrent threads on a few "
+        "tickets and report throughput, latency, time spent in locking "
+        "statements and double-booked seats. Fails when any seat is "
+        "booked twice, a request errors or the seat counters drift, so "
+        "it can gate releases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Number of concurrent clients, one user each.",
+        )
+        parser.add_argument(
+            "--tickets",
+            type=int,
+            default=10,
+            help="Number of tickets every client tries to reserve.",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="How many times the tickets are released and contended.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help="Use the configured database instead of a throwaway "
+                 "test database. It must be disposable.",
+        )
+
+    def handle(self, *args, **options):
+        if options["current_db"]:
+            report = self.stress(**options)
+        else:
+            with throwaway_database(verbosity=options["verbosity"] - 1):
+                report = self.stress(**options)
+
+        self.print_report(report)
+        failed = report["statuses"].get("error", 0)
+        if report["double_booked"] or failed or report["counter_drift"]:
+            raise CommandError(
+                f"{report['double_booked']} double-booked seat(s), "
+                f"{failed} failed request(s), "
+                f"seat counters drifted: {report['counter_drift']}"
+            )
+
+    def stress(self, threads, tickets, rounds, seed, **options) -> dict:
+        performance = create_sample_performance(
+            theatre_hall=create_sample_theatre(rows=1, seats_in_row=tickets)
+        )
+        performance.generate_tickets()
+        ticket_ids = list(performance.tickets.values_list("id", flat=True))
+        users = [
+            get_user_model().objects.create_user(
+                username=f"stress-{seed}-{index}",
+                password="stress-1-2-3",
+            )
+            for index in range(threads)
+        ]
+
+        results = {
+            "latencies": [],
+            "locking": [],
+            "statuses": Counter(),
+            "double_booked": 0,
+        }
+        lock = threading.Lock()
+        started = time.perf_counter()
+
+        for round_number in range(rounds):
+            barrier = threading.Barrier(threads)
+            workers = [
+                threading.Thread(
+                    target=self.worker,
+                    args=(
+                        user,
+                        ticket_ids,
+                        random.Random(f"{seed}-{round_number}-{index}"),
+                        barrier,
+                        results,
+                        lock,
+                    ),
+                )
+                for index, user in enumerate(users)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            results["double_booked"] += self.count_double_booked(ticket_ids)
+            # Deleted one by one so the signals free the seat counters.
+            for reservation in Reservation.objects.filter(
+                ticket_id__in=ticket_ids
+            ):
+                reservation.delete()
+
+        elapsed = time.perf_counter() - started
+        requests = len(results["latencies"])
+        return {
+            "vendor": connection.vendor,
+            "threads": threads,
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 1),
+            **latency_summary(results["latencies"]),
+            "locking_ms": round(sum(results["locking"]) * 1000, 1),
+            "statuses": dict(results["statuses"]),
+            "double_booked": results["double_booked"],
+            "counter_drift": self.counter_drift(),
+        }
+
+    @staticmethod
+    def worker(user, ticket_ids, rng, barrier, results, lock):
+        view = ReservationViewSet.as_view(
+            {"post": "create"},
+            throttle_classes=[],
+        )
+        factory = APIRequestFactory()
+        order = ticket_ids[:]
+        rng.shuffle(order)
+        latencies, locking, statuses = [], [], Counter()
+
+        def time_locking(execute, sql, params, many, context):
+            if not sql.lstrip().upper().startswith(LOCKING_STATEMENTS):
+                return execute(sql, params, many, context)
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                locking.append(time.perf_counter() - started)
+
+        barrier.wait()
+        try:
+            with connection.execute_wrapper(time_locking):
+                for ticket_id in order:
+                    request = factory.post(
+                        "/", {"ticket": ticket_id}, format="json"
+                    )
+                    force_authenticate(request, user=user)
+                    started = time.perf_counter()
+                    try:
+                        status_code = view(request).status_code
+                    except Exception:
+                        status_code = "error"
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status_code] += 1
+        finally:
+            connection.close()
+
+        with lock:
+            results["latencies"].extend(latencies)
+            results["locking"].extend(locking)
+            results["statuses"].update(statuses)
+
+    @staticmethod
+    def count_double_booked(ticket_ids) -> int:
+        return (
+            Reservation.objects.filter(ticket_id__in=ticket_ids)
+            .values("ticket")
+            .annotate(total=Count("id"))
+            .filter(total__gt=1)
+            .count()
+        )
+
+    @staticmethod
+    def counter_drift() -> bool:
+        try:
+            RebuildSeatCounters(stdout=StringIO()).check_counters()
+        except CommandError:
+            return True
+        return False
+
+    def print_report(self, report):
+        for key, value in report.items():
+            self.stdout.write(f"{key:>16}: {value}")
+
+        if report["double_booked"]:
+            self.stdout.write(self.style.ERROR("Seats were double booked"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No double-booked seats"))
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import defaultdict
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """
+    A labelled Prometheus histogram kept in process memory, so every
+    worker process exposes its own series.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.series = defaultdict(
+            lambda: {"buckets": [0] * len(self.buckets), "sum": 0, "count": 0}
+        )
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series[key]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.series.clear()
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            series = {key: dict(value) for key, value in self.series.items()}
+
+        for key, value in sorted(series.items()):
+            for bound, count in zip(self.buckets, value["buckets"]):
+                labels = _format_labels(key + (("le", str(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(key + (("le", "+Inf"),))
+            lines.append(f"{self.name}_bucket{labels} {value['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {value['sum']}")
+            lines.append(
+                f"{self.name}_count{_format_labels(key)} {value['count']}"
+            )
+        return lines
+
+
+def _format_labels(pairs) -> str:
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+REQUEST_DURATION = Histogram(
+    "theatre_request_duration_seconds",
+    "Total time spent handling the request.",
+    SECONDS_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "theatre_request_db_duration_seconds",
+    "Time spent executing database queries.",
+    SECONDS_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "theatre_request_db_queries",
+    "Number of database queries run.",
+    COUNT_BUCKETS,
+)
+REQUEST_AUTH_DURATION = Histogram(
+    "theatre_request_auth_duration_seconds",
+    "Time spent authenticating the request.",
+    SECONDS_BUCKETS,
+)
+REQUEST_SERIALIZER_DURATION = Histogram(
+    "theatre_request_serializer_duration_seconds",
+    "Time spent validating and representing data in serializers.",
+    SECONDS_BUCKETS,
+)
+HISTOGRAMS = (
+    REQUEST_DURATION,
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_AUTH_DURATION,
+    REQUEST_SERIALIZER_DURATION,
+)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Timings of one request, filled in while it is handled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.auth = 0.0
+        self.serializer = 0.0
+
+
+def get_request_timings(request):
+    """
+    The timings of a Django or DRF request, None when the metrics
+    middleware is not installed.
+    """
+    return getattr(getattr(request, "_request", request), "timings", None)
+
+
+class ServerTimingMixin:
+    """
+    Adds authentication and serializer time of the view to the request
+    timings collected by RequestMetricsMiddleware.
+    """
+
+    def perform_authentication(self, request):
+        timings = get_request_timings(request)
+        if timings is None:
+            return super().perform_authentication(request)
+
+        started = time.perf_counter()
+        try:
+            return super().perform_authentication(request)
+        finally:
+            timings.auth += time.perf_counter() - started
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timings = get_request_timings(self.request)
+        if timings is not None:
+            for method in ("run_validation", "to_representation"):
+                setattr(
+                    serializer,
+                    method,
+                    _timed(getattr(serializer, method), timings),
+                )
+        return serializer
+
+
+def _timed(method, timings):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.serializer += time.perf_counter() - started
+
+    return wrapper
@@ -0,0 +1,235 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.metrics import (
+    REQUEST_AUTH_DURATION,
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    REQUEST_SERIALIZER_DURATION,
+    RequestTimings,
+)
+from core.models import SlowRequest
+from core.profiling import Sampler
+
+INSTRUMENTED_NAMESPACES = ("core", "user")
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request to the core and user APIs: total, database (with
+    the query count), authentication and serializer time. The timings
+    are sent back in a Server-Timing header and recorded in the
+    histograms served by the metrics endpoint.
+
+    Removed from the stack entirely unless REQUEST_METRICS_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = request.timings = RequestTimings()
+
+        def time_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings.db += time.perf_counter() - started
+                timings.queries += 1
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(time_query))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None or match.namespace not in INSTRUMENTED_NAMESPACES:
+            return response
+
+        total = time.perf_counter() - timings.started
+        labels = {"route": match.view_name, "method": request.method}
+        REQUEST_DURATION.observe(total, status=response.status_code, **labels)
+        REQUEST_DB_DURATION.observe(timings.db, **labels)
+        REQUEST_DB_QUERIES.observe(timings.queries, **labels)
+        REQUEST_AUTH_DURATION.observe(timings.auth, **labels)
+        REQUEST_SERIALIZER_DURATION.observe(timings.serializer, **labels)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+                f"auth;dur={timings.auth * 1000:.2f}",
+                f"serializer;dur={timings.serializer * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+        return response
+
+
+class SlowRequestMiddleware:
+    """
+    Keep the requests to the core API that take longer than
+    SLOW_REQUEST_THRESHOLD_MS: the SQL they ran with its timings, and a
+    plan of the slowest SELECT (EXPLAIN ANALYZE with buffers on
+    PostgreSQL). Only the last SLOW_REQUEST_LIMIT are kept.
+
+    Sits above RequestMetricsMiddleware so the queries run for the
+    capture are not counted against the request.
+    """
+
+    def __init__(self, get_response):
+        if settings.SLOW_REQUEST_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            query_started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(
+                    {
+                        "connection": context["connection"],
+                        "sql": sql,
+                        "params": params,
+                        "many": many,
+                        "ms": (time.perf_counter() - query_started) * 1000,
+                    }
+                )
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            response = self.get_response(request)
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        if (
+            match is not None
+            and match.namespace == "core"
+            and duration_ms > settings.SLOW_REQUEST_THRESHOLD_MS
+        ):
+            self.capture(request, response, match, duration_ms, queries)
+        return response
+
+    @staticmethod
+    def capture(request, response, match, duration_ms, queries) -> None:
+        explain_sql, plan = "", ""
+        selects = [
+            query
+            for query in queries
+            if not query["many"]
+            and query["sql"].lstrip()[:6].upper() == "SELECT"
+        ]
+        if selects:
+            slowest = max(selects, key=lambda query: query["ms"])
+            explain_sql, plan = SlowRequestMiddleware.explain(slowest)
+
+        SlowRequest.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            route=match.view_name,
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            query_count=len(queries),
+            db_ms=sum(query["ms"] for query in queries),
+            queries=[
+                {
+                    "sql": query["sql"],
+                    "params": (
+                        []
+                        if query["many"]
+                        else [str(param) for param in query["params"] or ()]
+                    ),
+                    "ms": round(query["ms"], 3),
+                }
+                for query in queries
+            ],
+            explain_sql=explain_sql,
+            plan=plan,
+        )
+
+        limit = settings.SLOW_REQUEST_LIMIT
+        oldest_kept = SlowRequest.objects.values_list("id", flat=True)[
+            limit:limit + 1
+        ]
+        if oldest_kept:
+            SlowRequest.objects.filter(id__lte=oldest_kept[0]).delete()
+
+    @staticmethod
+    def explain(query) -> tuple:
+        connection = query["connection"]
+        if connection.vendor == "postgresql":
+            prefix = connection.ops.explain_query_prefix(
+                analyze=True, buffers=True
+            )
+        else:
+            prefix = connection.ops.explain_query_prefix()
+        explain_sql = f"{prefix} {query['sql']}"
+
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(explain_sql, query["params"])
+                    rows = cursor.fetchall()
+        except DatabaseError as error:
+            return explain_sql, f"EXPLAIN failed: {error}"
+
+        plan = "\n".join(
+            row[0] if len(row) == 1 else " ".join(map(str, row))
+            for row in rows
+        )
+        return explain_sql, plan
+
+
+class ProfilingMiddleware:
+    """
+    Answer requests made with `?__profile=1` by a staff user (JWT
+    authenticated) with a sampled profile of handling them instead of
+    the response: collapsed stacks, ready for flamegraph.pl or
+    speedscope. The status of the real response is in X-Profiled-Status.
+    """
+
+    parameter = "__profile"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.GET.get(self.parameter) != "1" or not self.is_staff(
+            request
+        ):
+            return self.get_response(request)
+
+        with Sampler(thread_ids={threading.get_ident()}) as sampler:
+            response = self.get_response(request)
+
+        profile = HttpResponse(
+            sampler.collapsed(), content_type="text/plain; charset=utf-8"
+        )
+        profile["X-Profile-Samples"] = sampler.samples
+        profile["X-Profiled-Status"] = response.status_code
+        return profile
+
+    @staticmethod
+    def is_staff(request) -> bool:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
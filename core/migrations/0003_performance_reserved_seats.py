@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_reserved_seats(apps, schema_editor):
+    Performance = apps.get_model("core", "Performance")
+    Reservation = apps.get_model("core", "Reservation")
+
+    Performance.objects.update(
+        reserved_seats=Coalesce(
+            Subquery(
+                Reservation.objects.filter(ticket__performance=OuterRef("pk"))
+                .values("ticket__performance")
+                .annotate(reserved=Count("id"))
+                .values("reserved")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_alter_theatrehall_rows_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="reserved_seats",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_reserved_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="performance",
+            options={"ordering": ("show_time", "id")},
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(fields=["show_time"], name="performance_show_time"),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time"], name="performance_play_show_time"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["theatre_hall", "show_time"], name="performance_hall_show_time"
+            ),
+        ),
+    ]
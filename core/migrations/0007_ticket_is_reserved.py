@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:33
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def flag_reserved_tickets(apps, schema_editor):
+    Ticket = apps.get_model("core", "Ticket")
+    Reservation = apps.get_model("core", "Reservation")
+
+    Ticket.objects.update(
+        is_reserved=Exists(Reservation.objects.filter(ticket=OuterRef("pk")))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_performance_show_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="is_reserved",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(flag_reserved_tickets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("is_reserved", False)),
+                fields=["performance", "row", "seat"],
+                name="ticket_available_seats",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_ticket_is_reserved"),
+    ]
+
+    # Existing rows are unique on (row, seat) and so on (performance, row,
+    # seat) as well: the narrower constraint is added before the global
+    # one is dropped, so tickets are never left unconstrained.
+    operations = [
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("performance", "row", "seat"),
+                name="ticket_unique_performance_seat",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def drop_double_bookings(apps, schema_editor):
+    """
+    Keep the earliest reservation of every ticket booked more than once,
+    then recount the seat bookkeeping those extra rows inflated.
+    """
+    Performance = apps.get_model("core", "Performance")
+    Ticket = apps.get_model("core", "Ticket")
+    Reservation = apps.get_model("core", "Reservation")
+
+    doubled = list(
+        Reservation.objects.filter(ticket__isnull=False)
+        .values("ticket")
+        .annotate(first=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    ticket_ids = [row["ticket"] for row in doubled]
+    if not ticket_ids:
+        return
+
+    keep = [row["first"] for row in doubled]
+    Reservation.objects.filter(ticket__in=ticket_ids).exclude(
+        id__in=keep
+    ).delete()
+
+    Ticket.objects.filter(id__in=ticket_ids).update(
+        is_reserved=Exists(Reservation.objects.filter(ticket=OuterRef("pk")))
+    )
+    Performance.objects.filter(tickets__id__in=ticket_ids).update(
+        reserved_seats=Coalesce(
+            Subquery(
+                Reservation.objects.filter(ticket__performance=OuterRef("pk"))
+                .values("ticket__performance")
+                .annotate(reserved=Count("id"))
+                .values("reserved")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_ticket_unique_performance_seat"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_double_bookings, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="reservation",
+            name="unique_ticket_for_reservation",
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                fields=("ticket",), name="unique_reservation_per_ticket"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_reservation_unique_ticket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowRequest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=2048)),
+                ("route", models.CharField(max_length=255)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("duration_ms", models.FloatField()),
+                ("query_count", models.PositiveIntegerField()),
+                ("db_ms", models.FloatField()),
+                ("queries", models.JSONField(default=list)),
+                ("explain_sql", models.TextField(blank=True)),
+                ("plan", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["-id"],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_slowrequest"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="reservation_user_created"
+            ),
+        ),
+    ]
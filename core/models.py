@@ -2,10 +2,21 @@ from django.core.validators import MinValueValidator
 
 from django.db import models
 
-from django.db.models import UniqueConstraint
+from django.db.models import (
+    UniqueConstraint,
+    F,
+    Q,
+    Count,
+    OuterRef,
+    Subquery,
+)
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
 
 from rest_framework.exceptions import ValidationError
 
+from core.cache import invalidate_cached_responses
+
 from theatre_service import settings
 
 
@@ -18,6 +29,7 @@ class Actor(models.Model):
         max_length=75,
         unique=True
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
@@ -28,6 +40,7 @@ class Genre(models.Model):
         max_length=50,
         unique=True
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self) -> str:
         return self.name
@@ -45,6 +58,7 @@ class Play(models.Model):
         Genre,
         related_name="plays",
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self) -> str:
         return self.title
@@ -61,11 +75,29 @@ class TheatreHall(models.Model):
         default=10,
         validators=[MinValueValidator(1)]
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self) -> str:
         return self.name
 
 
+class PerformanceQuerySet(models.QuerySet):
+    def with_available_seats(self):
+        held_seats = (
+            SeatHold.objects.active()
+            .filter(performance=OuterRef("pk"))
+            .values("performance")
+            .annotate(held=Count("id"))
+            .values("held")
+        )
+        return self.annotate(
+            available_seats=F("theatre_hall__rows")
+                            * F("theatre_hall__seats_in_row")
+                            - F("reserved_seats")
+                            - Coalesce(Subquery(held_seats), 0)
+        )
+
+
 class Performance(models.Model):
     play = models.ForeignKey(
         Play,
@@ -81,6 +113,61 @@ class Performance(models.Model):
 
     show_time = models.DateTimeField()
 
+    reserved_seats = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = PerformanceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("show_time", "id")
+        indexes = [
+            models.Index(
+                fields=["show_time"],
+                name="performance_show_time",
+            ),
+            models.Index(
+                fields=["play", "show_time"],
+                name="performance_play_show_time",
+            ),
+            models.Index(
+                fields=["theatre_hall", "show_time"],
+                name="performance_hall_show_time",
+            ),
+        ]
+
+    @staticmethod
+    def update_reserved_seats(ticket_ids, delta: int) -> None:
+        per_performance = (
+            Ticket.objects.filter(
+                id__in=ticket_ids,
+                performance__isnull=False,
+            )
+            .values("performance_id")
+            .annotate(tickets=Count("id"))
+        )
+        for row in per_performance:
+            Performance.objects.filter(pk=row["performance_id"]).update(
+                reserved_seats=F("reserved_seats") + delta * row["tickets"],
+                updated_at=Now(),
+            )
+
+    def generate_tickets(self, batch_size: int = 500) -> int:
+        hall = self.theatre_hall
+        existing = self.tickets.count()
+        Ticket.objects.bulk_create(
+            (
+                Ticket(performance=self, row=row, seat=seat)
+                for row in range(1, hall.rows + 1)
+                for seat in range(1, hall.seats_in_row + 1)
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return self.tickets.count() - existing
+
     def __str__(self) -> str:
         return f"{self.theatre_hall.name} - {self.play.title}"
 
@@ -97,8 +184,27 @@ class Ticket(models.Model):
         blank=True,
     )
 
+    is_reserved = models.BooleanField(
+        default=False,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
-        unique_together = ("row", "seat")
+        constraints = [
+            # Also serves as the (performance, row, seat) seat lookup index.
+            UniqueConstraint(
+                fields=["performance", "row", "seat"],
+                name="ticket_unique_performance_seat",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["performance", "row", "seat"],
+                condition=Q(is_reserved=False),
+                name="ticket_available_seats",
+            ),
+        ]
 
     @staticmethod
     def validate_seat_and_row(
@@ -148,14 +254,128 @@ class Reservation(models.Model):
         related_name="reservations",
         null=True,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         constraints = [
             UniqueConstraint(
-                fields=["user", "ticket"],
-                name="unique_ticket_for_reservation"
+                fields=["ticket"],
+                name="unique_reservation_per_ticket"
             )
         ]
+        indexes = [
+            # ReservationPagination's keyset within one user's rows.
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="reservation_user_created",
+            ),
+        ]
+
+    @staticmethod
+    def reserve_tickets(user, ticket_ids) -> list:
+        """
+        Insert reservations of already locked and checked tickets,
+        bypassing model signals, so the seat bookkeeping they would do
+        is done here for the whole batch.
+        """
+        reservations = Reservation.objects.bulk_create(
+            Reservation(user=user, ticket_id=ticket_id)
+            for ticket_id in ticket_ids
+        )
+        SeatHold.objects.filter(ticket_id__in=ticket_ids).delete()
+        Ticket.objects.filter(id__in=ticket_ids).update(
+            is_reserved=True,
+            updated_at=Now(),
+        )
+        Performance.update_reserved_seats(ticket_ids, 1)
+        invalidate_cached_responses(Reservation)
+        return reservations
+
+    @staticmethod
+    def is_double_booking(error) -> bool:
+        """
+        Whether an IntegrityError comes from the unique ticket
+        constraint. Postgres names the constraint, SQLite only its
+        columns.
+        """
+        name = "unique_reservation_per_ticket"
+        diag = getattr(error.__cause__, "diag", None)
+        if diag is not None and diag.constraint_name is not None:
+            return diag.constraint_name == name
+        message = str(error)
+        table = Reservation._meta.db_table
+        column = Reservation._meta.get_field("ticket").column
+        return name in message or message.endswith(f"{table}.{column}")
 
     def __str__(self) -> str:
         return f"Reservation for {self.user.username}"
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def change_markers(self) -> list:
+        # Holds stop counting against availability when they expire,
+        # which is not a write, so the next expiry marks a change too.
+        return [
+            self.active().order_by("expires_at").values("expires_at")[:1]
+        ]
+
+
+class SeatHold(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    performance = models.ForeignKey(
+        Performance,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name="hold"
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["performance", "expires_at"],
+                name="seat_hold_performance_expiry",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Hold for {self.user.username} until {self.expires_at}"
+
+
+class SlowRequest(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    route = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    db_ms = models.FloatField()
+    queries = models.JSONField(default=list)
+    explain_sql = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
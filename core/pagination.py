@@ -0,0 +1,179 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the full ``ordering`` key.
+
+    DRF's CursorPagination only keys on the first ordering field and
+    skips ties with an offset, so paging through many rows sharing that
+    field gets slower the deeper the client goes. Here the cursor carries
+    the value of every ordering field and the next page is a keyset
+    comparison against them, which keeps each page one index range scan.
+    The last ordering field must be unique. Nullable fields sort last.
+    """
+
+    ordering = ("id",)
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            queryset.model._meta.get_field(name) for name in self.ordering
+        ]
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["reverse"])
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(cursor["values"], reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_order_by(self, reverse: bool) -> list:
+        order_by = []
+        for name, field in zip(self.ordering, self.fields):
+            if not field.null:
+                order_by.append(f"-{name}" if reverse else name)
+            elif reverse:
+                order_by.append(F(name).desc(nulls_first=True))
+            else:
+                order_by.append(F(name).asc(nulls_last=True))
+        return order_by
+
+    def get_keyset_filter(self, values: list, reverse: bool) -> Q:
+        """
+        Rows strictly after the cursor in the (possibly reversed)
+        ordering, expanded as ``a > x OR (a = x AND b > y) OR ...``.
+        """
+        keyset = Q(pk__in=[])
+        equal_prefix = Q()
+
+        for name, field, value in zip(self.ordering, self.fields, values):
+            keyset |= equal_prefix & self.get_after(name, field, value, reverse)
+            if value is None:
+                equal_prefix &= Q(**{f"{name}__isnull": True})
+            else:
+                equal_prefix &= Q(**{name: value})
+
+        # Redundant with the expansion above, but gives the database a
+        # plain range condition on the leading index column.
+        if not self.fields[0].null:
+            lookup = "lte" if reverse else "gte"
+            keyset &= Q(**{f"{self.ordering[0]}__{lookup}": values[0]})
+
+        return keyset
+
+    @staticmethod
+    def get_after(name: str, field, value, reverse: bool) -> Q:
+        if reverse:
+            if value is None:
+                return Q(**{f"{name}__isnull": False})
+            return Q(**{f"{name}__lt": value})
+
+        if value is None:
+            return Q(pk__in=[])
+        after = Q(**{f"{name}__gt": value})
+        if field.null:
+            after |= Q(**{f"{name}__isnull": True})
+        return after
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.build_link(self.page[0], reverse=True)
+
+    def build_link(self, row, reverse: bool) -> str:
+        values = [
+            row[name] if isinstance(row, dict) else getattr(row, name)
+            for name in self.ordering
+        ]
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(values, reverse),
+        )
+
+    @staticmethod
+    def encode_cursor(values: list, reverse: bool) -> str:
+        payload = {
+            "v": [
+                value.isoformat() if isinstance(value, (date, datetime))
+                else value
+                for value in values
+            ],
+            "r": int(reverse),
+        }
+        return b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(b64decode(encoded.encode("ascii")))
+            values = [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, payload["v"], strict=True)
+            ]
+            reverse = bool(payload["r"])
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeError,
+            DjangoValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"values": values, "reverse": reverse}
+
+
+class PerformancePagination(KeysetPagination):
+    ordering = ("show_time", "id")
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ("performance_id", "row", "seat", "id")
+    max_page_size = 1000
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ("created_at", "id")
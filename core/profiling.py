@@ -0,0 +1,73 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005
+MAX_CAPTURE_SECONDS = 60
+
+
+class Sampler:
+    """
+    A statistical profiler: a background thread takes the Python stack of
+    the profiled threads every `interval` seconds. The result is written in
+    the collapsed stack format read by flamegraph.pl and speedscope, one
+    `frame;frame;frame count` line per distinct stack.
+
+    Profiles only the threads in `thread_ids`, or every other thread when
+    it is None.
+    """
+
+    def __init__(self, thread_ids=None, interval: float = SAMPLE_INTERVAL):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.ignored = {threading.get_ident()} if thread_ids is None else set()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampler", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        self.ignored.add(threading.get_ident())
+        while not self._stopped.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in self.ignored or (
+                    self.thread_ids is not None
+                    and thread_id not in self.thread_ids
+                ):
+                    continue
+                self.stacks[_collapse(frame)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+
+def capture(seconds: float) -> Sampler:
+    """Sample every thread but the calling one for `seconds`."""
+    with Sampler() as sampler:
+        time.sleep(seconds)
+    return sampler
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", code.co_filename)
+        names.append(f"{module}:{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
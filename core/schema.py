@@ -0,0 +1,47 @@
+from drf_spectacular.openapi import AutoSchema as BaseAutoSchema
+from drf_spectacular.utils import OpenApiParameter
+
+from core.fieldsets import (
+    EXPAND_PARAM,
+    FIELDS_PARAM,
+    FieldsetMixin,
+    get_expandable_fields,
+)
+
+
+class AutoSchema(BaseAutoSchema):
+    """Documents ?fields= and ?expand= on the views that take them."""
+
+    def get_override_parameters(self):
+        parameters = super().get_override_parameters()
+        view = self.view
+        if (
+            not isinstance(view, FieldsetMixin)
+            or self.method != "GET"
+            or getattr(view, "action", None) not in view.fieldset_actions
+        ):
+            return parameters
+
+        parameters = [
+            *parameters,
+            OpenApiParameter(
+                FIELDS_PARAM,
+                type={"type": "array", "items": {"type": "string"}},
+                description="Only return these fields, "
+                            "Example:(?fields=id,row,seat)",
+            ),
+        ]
+        expandable = list(get_expandable_fields(view.get_serializer_class()))
+        if expandable:
+            parameters.append(
+                OpenApiParameter(
+                    EXPAND_PARAM,
+                    type={
+                        "type": "array",
+                        "items": {"type": "string", "enum": expandable},
+                    },
+                    description="Return these relations as nested "
+                                f"objects, Example:(?expand={expandable[0]})",
+                )
+            )
+        return parameters
@@ -0,0 +1,49 @@
+import base64
+
+FREE = 0
+TAKEN = 1
+
+ENCODINGS = ("bitset", "rle", "json")
+
+
+def build_seat_grid(rows: int, seats_in_row: int, free_seats) -> bytearray:
+    """Row-major grid with one cell per seat, every seat TAKEN unless
+    it is listed in ``free_seats`` as a (row, seat) pair."""
+    grid = bytearray([TAKEN]) * (rows * seats_in_row)
+    for row, seat in free_seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            grid[(row - 1) * seats_in_row + (seat - 1)] = FREE
+    return grid
+
+
+def encode_bitset(grid: bytearray) -> str:
+    packed = bytearray((len(grid) + 7) // 8)
+    for index, cell in enumerate(grid):
+        if cell:
+            packed[index >> 3] |= 0x80 >> (index & 7)
+    return base64.b64encode(bytes(packed)).decode("ascii")
+
+
+def encode_rle(grid: bytearray) -> list:
+    runs = []
+    for cell in grid:
+        if runs and runs[-1][0] == cell:
+            runs[-1][1] += 1
+        else:
+            runs.append([cell, 1])
+    return runs
+
+
+def encode_json(grid: bytearray, seats_in_row: int) -> list:
+    return [
+        list(grid[start:start + seats_in_row])
+        for start in range(0, len(grid), seats_in_row)
+    ]
+
+
+def encode_seat_grid(grid: bytearray, seats_in_row: int, encoding: str):
+    if encoding == "bitset":
+        return encode_bitset(grid)
+    if encoding == "rle":
+        return encode_rle(grid)
+    return encode_json(grid, seats_in_row)
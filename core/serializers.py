@@ -1,5 +1,13 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+
+from core.cache import invalidate_cached_responses
+from core.exceptions import SeatsUnavailable, TicketAlreadyReserved
 from core.models import (
     Play,
     Actor,
@@ -8,10 +16,32 @@ from core.models import (
     TheatreHall,
     Ticket,
     Reservation,
+    SeatHold,
 )
 
 
+@contextmanager
+def reservation_conflict():
+    """
+    Report an insert that fails the unique ticket constraint, a
+    concurrent reservation of the same ticket, as a 409 conflict.
+    Wraps the transaction, which has to be rolled back first.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        if Reservation.is_double_booking(error):
+            raise TicketAlreadyReserved()
+        raise
+
+
 class PlaySerializer(serializers.ModelSerializer):
+    expandable_fields = {
+        "actors": "ActorSerializer",
+        "genres": "GenreSerializer",
+        "performances": "PerformanceSerializer",
+    }
+
     class Meta:
         model = Play
         fields = (
@@ -22,6 +52,8 @@ class PlaySerializer(serializers.ModelSerializer):
 
 
 class ActorSerializer(serializers.ModelSerializer):
+    expandable_fields = {"plays": "PlayListSerializer"}
+
     class Meta:
         model = Actor
         fields = (
@@ -56,6 +88,11 @@ class PlayListSerializer(PlaySerializer):
 
 
 class PerformanceSerializer(serializers.ModelSerializer):
+    expandable_fields = {
+        "play": "PlayListSerializer",
+        "theatre_hall": "TheatreHallRetrieveSerializer",
+    }
+
     class Meta:
         model = Performance
         fields = (
@@ -131,6 +168,13 @@ class PerformanceRetrieveSerializer(PerformanceSerializer):
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    performance = serializers.PrimaryKeyRelatedField(
+        queryset=Performance.objects.select_related("theatre_hall"),
+        allow_null=True,
+        required=False,
+    )
+    expandable_fields = {"performance": "PerformanceRetrieveSerializer"}
+
     class Meta:
         model = Ticket
         fields = (
@@ -142,11 +186,12 @@ class TicketSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs)
+        hall = attrs["performance"].theatre_hall
         Ticket.validate_seat_and_row(
             attrs["seat"],
-            attrs["performance"].theatre_hall.seats_in_row,
+            hall.seats_in_row,
             attrs["row"],
-            attrs["performance"].theatre_hall.rows,
+            hall.rows,
             serializers.ValidationError,
         )
         return data
@@ -167,11 +212,20 @@ class TicketRetrieveSerializer(TicketSerializer):
     performance = PerformanceListSerializer()
 
 
+class TicketSeatSerializer(TicketSerializer):
+    available = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = TicketSerializer.Meta.fields + ("available",)
+
+
 class ReservationSerializer(serializers.ModelSerializer):
     ticket = serializers.PrimaryKeyRelatedField(
-        queryset=Ticket.objects.filter(reservations__isnull=True),
+        queryset=Ticket.objects.filter(is_reserved=False),
         label="Available Tickets",
     )
+    expandable_fields = {"ticket": "TicketListSerializer"}
 
     class Meta:
         model = Reservation
@@ -180,13 +234,27 @@ class ReservationSerializer(serializers.ModelSerializer):
             "created_at",
             "ticket",
         )
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Reservation.objects.all().select_related("ticket"),
-                fields=("ticket",),
-                message="The reservation for this ticket already exists.",
+        # Double booking is prevented by the unique ticket constraint, see
+        # save(); a check-then-insert validator would only race with it.
+        validators = []
+
+    def validate_ticket(self, ticket):
+        holds = SeatHold.objects.active().filter(ticket=ticket)
+        request = self.context.get("request")
+        if request is not None:
+            holds = holds.exclude(user=request.user)
+
+        if holds.exists():
+            raise serializers.ValidationError(
+                "This ticket is held by another customer."
             )
-        ]
+        return ticket
+
+    def save(self, **kwargs):
+        # Optimistic insert: a concurrent reservation of the same ticket
+        # fails the constraint and is reported as a conflict.
+        with reservation_conflict(), transaction.atomic():
+            return super().save(**kwargs)
 
 
 class ReservationListSerializer(ReservationSerializer):
@@ -195,3 +263,226 @@ class ReservationListSerializer(ReservationSerializer):
 
 class ReservationRetrieveSerializer(ReservationSerializer):
     pass
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class SeatSelectionSerializer(serializers.Serializer):
+    MAX_SEATS = 20
+
+    tickets = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_SEATS,
+        required=False,
+    )
+    performance = serializers.PrimaryKeyRelatedField(
+        queryset=Performance.objects.all(),
+        required=False,
+    )
+    seats = SeatSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_SEATS,
+        required=False,
+    )
+
+    def validate(self, attrs):
+        by_ticket = "tickets" in attrs
+        by_seat = "performance" in attrs or "seats" in attrs
+
+        if by_ticket == by_seat:
+            raise serializers.ValidationError(
+                "Provide either tickets or performance with seats."
+            )
+        if by_seat and not ("performance" in attrs and "seats" in attrs):
+            raise serializers.ValidationError(
+                "performance and seats must be provided together."
+            )
+
+        if by_ticket:
+            requested = attrs["tickets"]
+        else:
+            requested = [(seat["row"], seat["seat"]) for seat in attrs["seats"]]
+        if len(set(requested)) != len(requested):
+            raise serializers.ValidationError("Seats must not repeat.")
+
+        return attrs
+
+    def get_ticket_filter(self, validated_data) -> Q:
+        if "tickets" in validated_data:
+            return Q(id__in=validated_data["tickets"])
+
+        seats = Q()
+        for seat in validated_data["seats"]:
+            seats |= Q(row=seat["row"], seat=seat["seat"])
+        return Q(performance=validated_data["performance"]) & seats
+
+    @staticmethod
+    def get_unavailable(validated_data, available_tickets):
+        if "tickets" in validated_data:
+            available = {ticket.id for ticket in available_tickets}
+            return [
+                ticket_id
+                for ticket_id in validated_data["tickets"]
+                if ticket_id not in available
+            ]
+
+        available = {(ticket.row, ticket.seat) for ticket in available_tickets}
+        return [
+            seat
+            for seat in validated_data["seats"]
+            if (seat["row"], seat["seat"]) not in available
+        ]
+
+    def lock_available_tickets(self, validated_data, user) -> list:
+        """
+        Lock the requested tickets for the current transaction and return
+        them, or raise SeatsUnavailable listing every seat that is missing,
+        reserved or held by somebody else.
+        """
+        # Tickets locked by a concurrent checkout are skipped and
+        # reported as unavailable instead of waiting for the lock.
+        tickets = list(
+            Ticket.objects.select_for_update(skip_locked=True)
+            .filter(self.get_ticket_filter(validated_data))
+        )
+        SeatHold.objects.filter(ticket__in=tickets).expired().delete()
+
+        # The rows are locked, so their is_reserved flags are current.
+        reserved = {ticket.id for ticket in tickets if ticket.is_reserved}
+        held = set(
+            SeatHold.objects.active()
+            .filter(ticket__in=tickets)
+            .exclude(user=user)
+            .values_list("ticket_id", flat=True)
+        )
+        available_tickets = [
+            ticket
+            for ticket in tickets
+            if ticket.id not in reserved and ticket.id not in held
+        ]
+
+        unavailable = self.get_unavailable(validated_data, available_tickets)
+        if unavailable:
+            raise SeatsUnavailable(unavailable)
+
+        return available_tickets
+
+
+class ReservationBulkSerializer(SeatSelectionSerializer):
+    def create(self, validated_data):
+        user = validated_data["user"]
+
+        with reservation_conflict(), transaction.atomic():
+            tickets = self.lock_available_tickets(validated_data, user)
+            return Reservation.reserve_tickets(
+                user,
+                [ticket.id for ticket in tickets]
+            )
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    expandable_fields = {
+        "performance": "PerformanceRetrieveSerializer",
+        "ticket": "TicketSerializer",
+    }
+
+    class Meta:
+        model = SeatHold
+        fields = (
+            "id",
+            "performance",
+            "ticket",
+            "created_at",
+            "expires_at",
+        )
+
+
+class SeatHoldCreateSerializer(SeatSelectionSerializer):
+    def get_ticket_filter(self, validated_data) -> Q:
+        return super().get_ticket_filter(validated_data) & Q(
+            performance__isnull=False
+        )
+
+    def create(self, validated_data):
+        user = validated_data["user"]
+
+        with reservation_conflict(), transaction.atomic():
+            tickets = self.lock_available_tickets(validated_data, user)
+            # Holding a seat again only extends the user's earlier hold.
+            SeatHold.objects.filter(ticket__in=tickets).delete()
+
+            expires_at = timezone.now() + settings.SEAT_HOLD_TTL
+            holds = SeatHold.objects.bulk_create(
+                SeatHold(
+                    user=user,
+                    performance_id=ticket.performance_id,
+                    ticket=ticket,
+                    expires_at=expires_at,
+                )
+                for ticket in tickets
+            )
+            invalidate_cached_responses(SeatHold)
+
+        return holds
+
+
+class SeatHoldCheckoutSerializer(serializers.Serializer):
+    holds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+        help_text="Holds to turn into reservations, "
+                  "all active holds of the user by default.",
+    )
+
+    def create(self, validated_data):
+        user = validated_data["user"]
+
+        with reservation_conflict(), transaction.atomic():
+            holds = SeatHold.objects.select_for_update().filter(user=user)
+            if "holds" in validated_data:
+                holds = holds.filter(id__in=validated_data["holds"])
+
+            now = timezone.now()
+            active = {
+                hold.id: hold.ticket_id
+                for hold in holds
+                if hold.expires_at > now
+            }
+
+            if "holds" in validated_data:
+                expired = [
+                    hold_id
+                    for hold_id in validated_data["holds"]
+                    if hold_id not in active
+                ]
+                if expired:
+                    raise SeatsUnavailable(expired)
+            if not active:
+                raise serializers.ValidationError(
+                    "There are no active seat holds to check out."
+                )
+
+            # A hold does not stop a reservation made before it was
+            # taken, or by an admin, so check the locked tickets too.
+            tickets = Ticket.objects.select_for_update().filter(
+                id__in=active.values()
+            )
+            reserved = {
+                ticket.id for ticket in tickets if ticket.is_reserved
+            }
+            if reserved:
+                raise SeatsUnavailable(
+                    [
+                        hold_id
+                        for hold_id, ticket_id in active.items()
+                        if ticket_id in reserved
+                    ]
+                )
+
+            return Reservation.reserve_tickets(user, list(active.values()))
@@ -0,0 +1,125 @@
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Now
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from core.cache import invalidate_cached_responses
+from core.models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Ticket,
+    Reservation,
+    SeatHold,
+)
+
+
+def _shift_reserved_seats(ticket_id, delta: int) -> None:
+    if ticket_id is None:
+        return
+    Performance.objects.filter(tickets__id=ticket_id).update(
+        reserved_seats=F("reserved_seats") + delta,
+        updated_at=Now(),
+    )
+    Ticket.objects.filter(pk=ticket_id).update(
+        is_reserved=Exists(Reservation.objects.filter(ticket=OuterRef("pk"))),
+        updated_at=Now(),
+    )
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_ticket(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    instance._previous_ticket_id = (
+        Reservation.objects.filter(pk=instance.pk)
+        .values_list("ticket_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Reservation)
+def count_reserved_seat(sender, instance, created, **kwargs):
+    if created:
+        _shift_reserved_seats(instance.ticket_id, 1)
+        SeatHold.objects.filter(ticket_id=instance.ticket_id).delete()
+        return
+
+    previous_ticket_id = getattr(instance, "_previous_ticket_id", None)
+    if previous_ticket_id != instance.ticket_id:
+        _shift_reserved_seats(previous_ticket_id, -1)
+        _shift_reserved_seats(instance.ticket_id, 1)
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reserved_seat(sender, instance, **kwargs):
+    _shift_reserved_seats(instance.ticket_id, -1)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_previous_performance(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    instance._previous_performance_id = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("performance_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def move_reserved_seat(sender, instance, created, **kwargs):
+    if created:
+        return
+    previous_performance_id = getattr(
+        instance, "_previous_performance_id", None
+    )
+    if previous_performance_id == instance.performance_id:
+        return
+    if not Reservation.objects.filter(ticket=instance).exists():
+        return
+
+    for performance_id, delta in (
+        (previous_performance_id, -1),
+        (instance.performance_id, 1),
+    ):
+        Performance.objects.filter(pk=performance_id).update(
+            reserved_seats=F("reserved_seats") + delta,
+            updated_at=Now(),
+        )
+    # Only the ticket is saved, the counters change behind an update().
+    invalidate_cached_responses(Performance)
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_save, sender=Performance)
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=TheatreHall)
+@receiver(post_delete, sender=Performance)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=SeatHold)
+def invalidate_model_responses(sender, **kwargs):
+    invalidate_cached_responses(sender)
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def invalidate_relation_responses(sender, instance, action, model, **kwargs):
+    if action.startswith("post_"):
+        invalidate_cached_responses(type(instance), model)
@@ -27,7 +27,7 @@ class AuthenticatedUserTest(TestCase):
         serializer = GenreSerializer(genres, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_genre_create_forbidden(self):
         payload = {
@@ -1,13 +1,23 @@
 from datetime import datetime
+from io import StringIO
+from unittest import skipUnless
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ticket, Reservation
-from core.serializers import ReservationListSerializer
+from core.models import Ticket, Reservation, Performance
+from core.pagination import ReservationPagination
+from core.serializers import (
+    ReservationListSerializer,
+    ReservationSerializer,
+)
+from core.tests.config_for_tests import create_sample_performance
 
 
 class AuthenticatedUserTest(TestCase):
@@ -40,7 +50,7 @@ class AuthenticatedUserTest(TestCase):
         serializer = ReservationListSerializer(reservations, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_reservation_allow_create(self):
         ticket = Ticket.objects.create(
@@ -96,3 +106,283 @@ class AuthenticatedUserTest(TestCase):
         url = reverse("core:reservation-detail", args=[reservation.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class SeatCounterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+        )
+
+    def test_reservation_create_increments_counter(self):
+        url = reverse("core:reservation-list")
+        self.client.post(url, {"ticket": self.ticket.id})
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 1)
+
+    def test_reservation_delete_decrements_counter(self):
+        reservation = Reservation.objects.create(
+            ticket=self.ticket,
+            user=self.user,
+        )
+        url = reverse("core:reservation-detail", args=[reservation.id])
+        self.client.delete(url)
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 0)
+
+    def test_moving_reserved_ticket_moves_counter(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.user)
+        other = create_sample_performance()
+
+        self.ticket.performance = other
+        self.ticket.save()
+
+        self.performance.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 0)
+        self.assertEqual(other.reserved_seats, 1)
+
+    def test_moving_free_ticket_keeps_counters(self):
+        other = create_sample_performance()
+
+        self.ticket.performance = other
+        self.ticket.save()
+
+        self.performance.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 0)
+        self.assertEqual(other.reserved_seats, 0)
+
+    def test_performance_list_reads_counter(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.user)
+        url = reverse("core:performance-list")
+
+        response = self.client.get(url)
+
+        hall = self.performance.theatre_hall
+        self.assertEqual(
+            response.data["results"][0]["available_seats"],
+            hall.rows * hall.seats_in_row - 1,
+        )
+
+    def test_reservation_pages_use_user_created_index(self):
+        queryset = Reservation.objects.filter(user=self.user).order_by(
+            *ReservationPagination.ordering
+        )
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # tiny test tables would otherwise always be seq scanned
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset[:10].explain()
+
+        self.assertIn("reservation_user_created", plan)
+
+    def test_rebuild_seat_counters(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.user)
+        Performance.objects.update(reserved_seats=5)
+        Ticket.objects.update(is_reserved=False)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+        call_command("rebuild_seat_counters", stdout=StringIO())
+
+        self.performance.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 1)
+        self.assertTrue(self.ticket.is_reserved)
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+
+class DoubleBookingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            username="otheruser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+        )
+        self.url = reverse("core:reservation-list")
+
+    def test_ticket_reserved_once(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.other_user)
+
+        with self.assertRaises(IntegrityError):
+            Reservation.objects.create(ticket=self.ticket, user=self.user)
+
+    def test_concurrent_reservation_conflicts(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.other_user)
+        # What a request that read the ticket before that commit sees.
+        Ticket.objects.update(is_reserved=False)
+
+        response = self.client.post(self.url, {"ticket": self.ticket.id})
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["detail"].code, "ticket_already_reserved")
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 1)
+
+    def test_other_integrity_errors_are_not_conflicts(self):
+        serializer = ReservationSerializer(data={"ticket": self.ticket.id})
+        serializer.is_valid(raise_exception=True)
+
+        # No user: the NOT NULL column fails, not the ticket constraint.
+        with self.assertRaises(IntegrityError):
+            serializer.save()
+
+    def test_reservation_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {"ticket": self.ticket.id})
+
+        inserts = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(inserts), 1)
+
+
+class BulkReservationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.tickets = [
+            Ticket.objects.create(row=1, seat=seat, performance=self.performance)
+            for seat in range(1, 4)
+        ]
+        self.url = reverse("core:reservation-bulk")
+
+    def test_bulk_reserve_by_ticket_ids(self):
+        payload = {"tickets": [ticket.id for ticket in self.tickets]}
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(
+            Reservation.objects.filter(user=self.user).count(),
+            3
+        )
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.reserved_seats, 3)
+
+    def test_bulk_reserve_by_seats(self):
+        payload = {
+            "performance": self.performance.id,
+            "seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 3}],
+        }
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Reservation.objects.values_list("ticket__seat", flat=True)),
+            {1, 3},
+        )
+
+    def test_bulk_reserve_is_all_or_nothing(self):
+        other_user = get_user_model().objects.create_user(
+            username="otheruser",
+            password="test-1-2-3",
+        )
+        Reservation.objects.create(ticket=self.tickets[1], user=other_user)
+        payload = {
+            "performance": self.performance.id,
+            "seats": [
+                {"row": 1, "seat": 1},
+                {"row": 1, "seat": 2},
+                {"row": 5, "seat": 5},
+            ],
+        }
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["unavailable"],
+            [{"row": 1, "seat": 2}, {"row": 5, "seat": 5}],
+        )
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+
+    def test_bulk_reserve_racing_insert_conflicts(self):
+        other_user = get_user_model().objects.create_user(
+            username="otheruser",
+            password="test-1-2-3",
+        )
+        Reservation.objects.create(ticket=self.tickets[0], user=other_user)
+        # What a request that locked the ticket before that commit sees.
+        Ticket.objects.update(is_reserved=False)
+        payload = {"tickets": [self.tickets[0].id]}
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["detail"].code, "ticket_already_reserved")
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+
+    def test_bulk_reserve_requires_one_mode(self):
+        payload = {
+            "tickets": [self.tickets[0].id],
+            "performance": self.performance.id,
+        }
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StressReservationsTest(TransactionTestCase):
+    def stress(self, threads: int) -> str:
+        out = StringIO()
+        call_command(
+            "stress_reservations",
+            "--current-db",
+            threads=threads,
+            tickets=3,
+            rounds=2,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_single_client(self):
+        output = self.stress(threads=1)
+
+        self.assertIn("No double-booked seats", output)
+        self.assertIn("201: 6", output)
+
+    @skipUnless(
+        connection.vendor == "postgresql",
+        "needs a database with row-level locking",
+    )
+    def test_concurrent_clients(self):
+        self.assertIn("No double-booked seats", self.stress(threads=8))
@@ -32,7 +32,7 @@ class AuthenticatedUserTest(TestCase):
         serializer = ActorListSerializer(actors, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_actor_retrieve(self):
         actor = Actor.objects.create(
@@ -0,0 +1,37 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.management.commands.benchmark_serializers import BENCHMARKS
+
+
+class BenchmarkSerializersTest(TestCase):
+    def test_benchmarks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "results.json"
+            call_command(
+                "benchmark_serializers",
+                "--current-db",
+                sizes="20,200",
+                page_size=5,
+                repeat=1,
+                json=str(output),
+                stdout=StringIO(),
+            )
+            results = json.loads(output.read_text())
+
+        self.assertEqual(set(results), set(BENCHMARKS))
+        for name, sizes in results.items():
+            small, large = sizes["20"], sizes["200"]
+            self.assertEqual(
+                small["objects"], 1 if name == "play-retrieve" else 5
+            )
+            # Fetching a page must not cost more queries on a bigger table.
+            self.assertEqual(small["queries"], large["queries"], name)
+            self.assertGreater(large["serialize_us_per_object"], 0)
+            self.assertGreater(large["render_us_per_object"], 0)
+            self.assertGreater(large["json_render_us_per_object"], 0)
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.fast_list import FastListMixin, compile_fast_list
+from core.models import Actor, Ticket
+from core.serializers import (
+    ActorListSerializer,
+    PerformanceListSerializer,
+    PlayRetrieveSerializer,
+    TicketListSerializer,
+)
+from core.tests.config_for_tests import (
+    create_sample_performance,
+    create_sample_plays,
+)
+
+
+class FastListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+
+        plays = [
+            create_sample_plays(title=f"Play {number}") for number in range(3)
+        ]
+        for play in plays:
+            performance = create_sample_performance(play=play)
+            Ticket.objects.bulk_create(
+                Ticket(performance=performance, row=row, seat=seat)
+                for row in (1, 2)
+                for seat in (1, 2)
+            )
+        for number in range(3):
+            actor = Actor.objects.create(
+                first_name=f"First {number}", last_name=f"Last {number}"
+            )
+            actor.plays.set(plays[number:])
+
+    def assert_same_as_serializer(self, url, params):
+        response = self.client.get(url, params)
+        cache.clear()
+        with mock.patch.object(
+            FastListMixin, "get_fast_list", return_value=None
+        ):
+            expected = self.client.get(url, params)
+
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_compiled(self):
+        for serializer_class in (
+            PerformanceListSerializer,
+            TicketListSerializer,
+            ActorListSerializer,
+        ):
+            self.assertIsNotNone(compile_fast_list(serializer_class))
+
+    def test_nested_serializers_not_compiled(self):
+        self.assertIsNone(compile_fast_list(PlayRetrieveSerializer))
+
+    def test_same_output(self):
+        for name in ("performance-list", "ticket-list", "actor-list"):
+            url = reverse(f"core:{name}")
+            response = self.assert_same_as_serializer(url, {"page_size": 2})
+
+            # And the cursor pages after the first one.
+            while response.data["next"]:
+                response = self.assert_same_as_serializer(
+                    response.data["next"], {}
+                )
+
+    @override_settings(TIME_ZONE="UTC")
+    def test_same_output_in_utc(self):
+        self.assert_same_as_serializer(reverse("core:performance-list"), {})
+
+    def test_actor_plays_second_query(self):
+        # The conditional GET check, actors and their plays.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("core:actor-list"))
+
+        self.assertEqual(
+            [actor["plays"] for actor in response.data["results"]],
+            [["Play 0", "Play 1", "Play 2"], ["Play 1", "Play 2"], ["Play 2"]],
+        )
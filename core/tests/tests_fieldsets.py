@@ -0,0 +1,207 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Actor, Genre, Reservation, Ticket
+from core.tests.config_for_tests import (
+    create_sample_performance,
+    create_sample_plays,
+)
+
+class FieldsetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.play = create_sample_plays()
+        self.play.actors.add(
+            Actor.objects.create(first_name="Ian", last_name="McKellen")
+        )
+        self.play.genres.add(Genre.objects.create(name="Drama"))
+        self.performance = create_sample_performance(play=self.play)
+        self.ticket = Ticket.objects.create(
+            performance=self.performance, row=1, seat=1
+        )
+
+    def test_ticket_fields(self):
+        url = reverse("core:ticket-detail", args=[self.ticket.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"fields": "id,row,seat"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, {"id": self.ticket.id, "row": 1, "seat": 1}
+        )
+        ticket_query = next(
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "core_ticket"."id"')
+        )
+        self.assertNotIn("core_performance", ticket_query)
+        self.assertNotIn('"core_ticket"."updated_at"', ticket_query)
+
+    def test_ticket_list_fields(self):
+        Ticket.objects.create(performance=self.performance, row=1, seat=2)
+        url = reverse("core:ticket-list")
+
+        response = self.client.get(
+            url, {"fields": "id,seat", "page_size": 1}
+        )
+        next_page = self.client.get(response.data["next"])
+
+        self.assertEqual(
+            response.data["results"], [{"id": self.ticket.id, "seat": 1}]
+        )
+        self.assertEqual(next_page.data["results"][0]["seat"], 2)
+
+    def test_ticket_list_expand(self):
+        url = reverse("core:ticket-list")
+
+        with CaptureQueriesContext(connection) as one_ticket:
+            response = self.client.get(url, {"expand": "performance"})
+        for seat in range(2, 6):
+            Ticket.objects.create(
+                performance=create_sample_performance(play=self.play),
+                row=1,
+                seat=seat,
+            )
+        with CaptureQueriesContext(connection) as five_tickets:
+            self.client.get(url, {"expand": "performance"})
+
+        performance = response.data["results"][0]["performance"]
+        self.assertEqual(performance["id"], self.performance.id)
+        self.assertEqual(performance["play"], self.play.title)
+        self.assertEqual(
+            set(performance["theatre_hall"]),
+            {"id", "name", "rows", "seats_in_row"},
+        )
+        self.assertEqual(len(one_ticket), len(five_tickets))
+
+    def test_play_fields_skip_relations(self):
+        url = reverse("core:play-detail", args=[self.play.id])
+
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as picked:
+            response = self.client.get(url, {"fields": "id,title"})
+
+        self.assertEqual(
+            response.data, {"id": self.play.id, "title": self.play.title}
+        )
+        # No actors, genres or performances prefetched.
+        self.assertEqual(len(picked), len(full) - 3)
+
+    def test_play_list_expand(self):
+        response = self.client.get(
+            reverse("core:play-list"), {"expand": "actors,genres"}
+        )
+
+        play = response.data["results"][0]
+        self.assertEqual(play["genres"], [{"name": "Drama"}])
+        self.assertEqual(play["actors"][0]["last_name"], "McKellen")
+
+    def test_performance_list_fields_and_expand(self):
+        response = self.client.get(
+            reverse("core:performance-list"),
+            {"fields": "id,play", "expand": "play"},
+        )
+
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "id": self.performance.id,
+                    "play": {
+                        "id": self.play.id,
+                        "title": self.play.title,
+                        "description": self.play.description,
+                    },
+                }
+            ],
+        )
+
+    def test_expanded_relation_changes_cache_and_etag(self):
+        url = reverse("core:play-list")
+        first = self.client.get(url, {"expand": "actors"})
+
+        actor = self.play.actors.get()
+        actor.last_name = "Gielgud"
+        actor.save()
+        second = self.client.get(
+            url,
+            {"expand": "actors"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(
+            second.data["results"][0]["actors"][0]["last_name"], "Gielgud"
+        )
+
+    def test_expanded_ticket_changes_reservation_etag(self):
+        Reservation.objects.create(user=self.user, ticket=self.ticket)
+        url = reverse("core:reservation-list")
+        first = self.client.get(url, {"expand": "ticket"})
+
+        self.ticket.seat = 2
+        self.ticket.save()
+        second = self.client.get(
+            url,
+            {"expand": "ticket"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["results"][0]["ticket"]["seat"], 2)
+
+    def test_blank_fields_ignored(self):
+        response = self.client.get(
+            reverse("core:performance-list"), {"fields": ""}
+        )
+
+        self.assertEqual(
+            response.data["results"][0]["id"], self.performance.id
+        )
+        self.assertIn("show_time", response.data["results"][0])
+
+    def test_unknown_fields(self):
+        response = self.client.get(
+            reverse("core:ticket-list"), {"fields": "id,price"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price", response.data["fields"])
+
+    def test_unknown_expand(self):
+        response = self.client.get(
+            reverse("core:genre-list"), {"expand": "plays"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", response.data)
+
+    def test_schema_documents_parameters(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        parameters = {
+            parameter["name"]: parameter
+            for parameter in schema["paths"]["/theatre/api/tickets/"]["get"][
+                "parameters"
+            ]
+        }
+        self.assertIn("fields", parameters)
+        self.assertEqual(
+            parameters["expand"]["schema"]["items"]["enum"], ["performance"]
+        )
+        self.assertIn("performance", parameters)
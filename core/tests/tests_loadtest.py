@@ -0,0 +1,114 @@
+import json
+import random
+import tempfile
+from datetime import date
+from http.client import BadStatusLine
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command, CommandError
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from core.management.commands.loadtest import (
+    VirtualUser,
+    is_conflict,
+    is_error,
+)
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    def setUp(self):
+        call_command(
+            "seed_theatre",
+            plays=2,
+            halls=1,
+            performances_per_play=2,
+            users=2,
+            start_date=date(2025, 1, 1),
+            stdout=StringIO(),
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = Path(directory.name) / "baseline.json"
+
+    def loadtest(self, *args) -> str:
+        out = StringIO()
+        call_command(
+            "loadtest",
+            *args,
+            url=self.live_server_url,
+            users=2,
+            iterations=15,
+            accounts=2,
+            baseline=str(self.baseline),
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_save_and_compare_baseline(self):
+        self.loadtest("--save-baseline")
+        report = json.loads(self.baseline.read_text())
+
+        self.assertTrue(report["endpoints"])
+        for result in report["endpoints"].values():
+            self.assertEqual(result["errors"], 0)
+
+        # Regressions are judged with a generous tolerance here, the
+        # point is the comparison, not the speed of the test server.
+        self.assertIn("No regressions", self.loadtest("--tolerance", "100"))
+
+    def test_regression_against_baseline(self):
+        self.loadtest("--save-baseline")
+        report = json.loads(self.baseline.read_text())
+        for result in report["endpoints"].values():
+            result["p95_ms"] = result["p99_ms"] = 0.001
+        self.baseline.write_text(json.dumps(report))
+
+        with self.assertRaises(CommandError):
+            self.loadtest()
+
+
+class BrokenConnection:
+    """Answers every request with a malformed status line."""
+
+    closed = False
+
+    def request(self, *args):
+        pass
+
+    def getresponse(self):
+        raise BadStatusLine("HTTP/1.1 ???")
+
+    def close(self):
+        self.closed = True
+
+
+class LoadTestErrorsTest(SimpleTestCase):
+    def test_protocol_error_is_recorded(self):
+        recorded = []
+        user = VirtualUser(
+            "http://testserver",
+            "user",
+            "password",
+            random.Random(0),
+            lambda *sample: recorded.append(sample[:2]),
+        )
+        user.connection = BrokenConnection()
+
+        self.assertIsNone(user.request("plays", "GET", "/"))
+        self.assertEqual(recorded, [("plays", "error")])
+        self.assertTrue(user.connection.closed)
+
+    def test_errors(self):
+        self.assertTrue(is_error("error"))
+        self.assertTrue(is_error(429))
+        self.assertTrue(is_error(500))
+        self.assertFalse(is_error(400))
+        self.assertFalse(is_error(201))
+        self.assertFalse(is_error(304))
+
+    def test_reservation_conflicts(self):
+        self.assertTrue(is_conflict("reserve", 400))
+        self.assertTrue(is_conflict("reserve", 409))
+        self.assertFalse(is_conflict("reserve", 201))
+        self.assertFalse(is_conflict("plays", 409))
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import HISTOGRAMS
+from core.tests.config_for_tests import create_sample_performance
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        create_sample_performance()
+
+    @staticmethod
+    def server_timing(response) -> dict:
+        timings = {}
+        for metric in response["Server-Timing"].split(", "):
+            name, duration, *desc = metric.split(";")
+            timings[name] = float(duration.removeprefix("dur="))
+        return timings
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("core:performance-list"))
+
+        timings = self.server_timing(response)
+        self.assertEqual(
+            set(timings), {"db", "auth", "serializer", "total"}
+        )
+        self.assertGreater(timings["serializer"], 0)
+        self.assertGreaterEqual(timings["total"], timings["db"])
+        self.assertIn("queries", response["Server-Timing"])
+
+    def test_user_routes_are_timed(self):
+        response = APIClient().post(
+            reverse("user:token_obtain_pair"),
+            {"username": "testuser", "password": "test-1-2-3"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(self.server_timing(response)["serializer"], 0)
+
+    def test_metrics_admin_only(self):
+        response = self.client.get(reverse("core:metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_histograms(self):
+        self.client.get(reverse("core:performance-list"))
+        self.user.is_staff = True
+
+        response = self.client.get(reverse("core:metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn("# TYPE theatre_request_duration_seconds histogram", body)
+        self.assertIn(
+            'theatre_request_db_queries_count{method="GET",'
+            'route="core:performance-list"} 1',
+            body,
+        )
+        self.assertIn('le="+Inf"', body)
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("core:performance-list"))
+
+        self.assertNotIn("Server-Timing", response)
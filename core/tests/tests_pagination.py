@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ticket
+from core.pagination import TicketPagination
+from core.tests.config_for_tests import create_sample_performance
+
+TICKET_URL = reverse("core:ticket-list")
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+
+        first = create_sample_performance()
+        second = create_sample_performance()
+        seats = iter(range(1, 100))
+        for performance in (second, None, first):
+            for row in (2, 1):
+                Ticket.objects.create(
+                    row=row,
+                    seat=next(seats),
+                    performance=performance,
+                )
+
+        self.expected = list(
+            Ticket.objects.order_by(
+                F("performance_id").asc(nulls_last=True),
+                "row",
+                "seat",
+            ).values_list("id", flat=True)
+        )
+
+    def collect(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_forward_pages_cover_every_row_once(self):
+        ids = []
+        page = self.collect(TICKET_URL, {"page_size": 4})
+        ids += [ticket["id"] for ticket in page["results"]]
+
+        while page["next"]:
+            page = self.collect(page["next"])
+            ids += [ticket["id"] for ticket in page["results"]]
+
+        self.assertEqual(ids, self.expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first_page = self.collect(TICKET_URL, {"page_size": 2})
+        second_page = self.collect(first_page["next"])
+        third_page = self.collect(second_page["next"])
+
+        back = self.collect(third_page["previous"])
+
+        self.assertEqual(back["results"], second_page["results"])
+        self.assertIsNone(self.collect(back["previous"])["previous"])
+
+    def test_page_size_capped(self):
+        self.assertEqual(TicketPagination.max_page_size, 1000)
+        page = self.collect(TICKET_URL, {"page_size": 10_000})
+
+        self.assertEqual(len(page["results"]), len(self.expected))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(TICKET_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
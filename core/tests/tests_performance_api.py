@@ -1,17 +1,22 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
 from django.db.models import F, Count
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from core.models import Performance
+from core.models import Performance, Ticket, Reservation, Genre, Actor
 from core.serializers import (
     PerformanceListSerializer,
     PerformanceRetrieveSerializer
 )
+from core.views import PerformanceViewSet
 from core.tests.config_for_tests import (
     create_sample_plays,
     create_sample_theatre,
@@ -42,7 +47,7 @@ class AuthenticatedUserTest(TestCase):
         )
         serializer = PerformanceListSerializer(performances, many=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_performance_detail(self):
         performance = create_sample_performance()
@@ -91,3 +96,370 @@ class AuthenticatedUserTest(TestCase):
         url = reverse("core:performance-detail", kwargs={"pk": performance.pk})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class PerformanceSeatMapTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance(
+            theatre_hall=create_sample_theatre(rows=2, seats_in_row=3)
+        )
+        for row, seat in ((1, 1), (1, 2), (2, 3)):
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=self.performance,
+            )
+        Reservation.objects.create(
+            ticket=Ticket.objects.get(row=1, seat=2),
+            user=self.user,
+        )
+        self.url = reverse(
+            "core:performance-seat-map",
+            args=[self.performance.id]
+        )
+
+    def test_seat_map_bitset(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 2)
+        self.assertEqual(response.data["seats_in_row"], 3)
+        # 0 1 1 / 1 1 0 packed MSB first
+        self.assertEqual(response.data["seats"], "eA==")
+
+    def test_seat_map_rle(self):
+        response = self.client.get(self.url, {"encoding": "rle"})
+
+        self.assertEqual(response.data["seats"], [[0, 1], [1, 4], [0, 1]])
+
+    def test_seat_map_json(self):
+        response = self.client.get(self.url, {"encoding": "json"})
+
+        self.assertEqual(response.data["seats"], [[0, 1, 1], [1, 1, 0]])
+
+    def test_seat_map_unknown_encoding(self):
+        response = self.client.get(self.url, {"encoding": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PerformanceGenerateTicketsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance(
+            theatre_hall=create_sample_theatre(rows=3, seats_in_row=4)
+        )
+        self.url = reverse(
+            "core:performance-generate-tickets",
+            args=[self.performance.id]
+        )
+
+    def test_generate_tickets_forbidden(self):
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_admin_generate_tickets(self):
+        self.user.is_staff = True
+        Ticket.objects.create(row=2, seat=2, performance=self.performance)
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 11)
+        self.assertEqual(
+            set(self.performance.tickets.values_list("row", "seat")),
+            {(row, seat) for row in range(1, 4) for seat in range(1, 5)},
+        )
+
+    def test_admin_generate_tickets_is_idempotent(self):
+        self.user.is_staff = True
+        self.client.post(self.url)
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual(self.performance.tickets.count(), 12)
+
+    def test_admin_generate_tickets_for_each_performance(self):
+        self.user.is_staff = True
+        self.client.post(self.url)
+        other = create_sample_performance(
+            theatre_hall=self.performance.theatre_hall
+        )
+
+        response = self.client.post(
+            reverse("core:performance-generate-tickets", args=[other.id])
+        )
+
+        self.assertEqual(response.data["created"], 12)
+        self.assertEqual(Ticket.objects.count(), 24)
+
+
+class PerformanceSeatTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.ticket = Ticket.objects.create(
+            row=2,
+            seat=3,
+            performance=self.performance,
+        )
+
+    def get_seat(self, row: int, seat: int):
+        return self.client.get(
+            reverse(
+                "core:performance-seat",
+                args=[self.performance.id, row, seat],
+            )
+        )
+
+    def test_seat(self):
+        response = self.get_seat(2, 3)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.ticket.id)
+        self.assertTrue(response.data["available"])
+
+    def test_reserved_seat(self):
+        Reservation.objects.create(ticket=self.ticket, user=self.user)
+
+        response = self.get_seat(2, 3)
+
+        self.assertFalse(response.data["available"])
+
+    def test_missing_seat(self):
+        response = self.get_seat(3, 2)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PerformanceConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.url = reverse("core:performance-list")
+
+    def test_etag_returned(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+
+    def test_not_modified_without_running_queryset(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_after_reservation(self):
+        etag = self.client.get(self.url)["ETag"]
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance
+        )
+        Reservation.objects.create(ticket=ticket, user=self.user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_changes_after_reservation_of_older_row(self):
+        later = create_sample_performance()
+        Performance.objects.filter(pk=later.pk).update(
+            updated_at=timezone.now() + timedelta(days=1)
+        )
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance
+        )
+        etag = self.client.get(self.url)["ETag"]
+
+        # The counter moves, the latest updated_at does not.
+        Reservation.objects.create(ticket=ticket, user=self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_after_delete(self):
+        url = reverse("core:performance-detail", args=[self.performance.id])
+        etag = self.client.get(url)["ETag"]
+        create_sample_performance().delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_any_etag_matches_existing_performance_only(self):
+        url = reverse("core:performance-detail", args=[self.performance.id])
+        missing = reverse("core:performance-detail", args=[0])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(missing, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PerformanceFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("core:performance-list")
+
+        tz = timezone.get_default_timezone()
+        self.hamlet = create_sample_plays(title="Hamlet")
+        self.drama = Genre.objects.create(name="Drama")
+        self.hamlet.genres.add(self.drama)
+        self.actor = Actor.objects.create(first_name="Ian", last_name="McKellen")
+        self.hamlet.actors.add(self.actor)
+
+        self.small_hall = create_sample_theatre(rows=1, seats_in_row=1)
+        # 23:30 local time is already the next day in UTC
+        self.late = create_sample_performance(
+            play=self.hamlet,
+            show_time=datetime(2024, 12, 20, 23, 30, tzinfo=tz),
+        )
+        self.next_day = create_sample_performance(
+            show_time=datetime(2024, 12, 21, 0, 30, tzinfo=tz),
+            theatre_hall=self.small_hall,
+        )
+        self.later = create_sample_performance(
+            play=self.hamlet,
+            show_time=datetime(2024, 12, 25, 19, 0, tzinfo=tz),
+        )
+
+    def filtered_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [performance["id"] for performance in response.data["results"]]
+
+    def test_filter_by_local_date(self):
+        self.assertEqual(self.filtered_ids(date="2024-12-20"), [self.late.id])
+
+    def test_filter_by_date_range(self):
+        self.assertEqual(
+            self.filtered_ids(date_from="2024-12-21", date_to="2024-12-25"),
+            [self.next_day.id, self.later.id],
+        )
+
+    def test_filter_by_hall_genre_and_actor(self):
+        self.assertEqual(
+            self.filtered_ids(hall=str(self.small_hall.id)),
+            [self.next_day.id],
+        )
+        self.assertEqual(
+            self.filtered_ids(genre=str(self.drama.id)),
+            [self.late.id, self.later.id],
+        )
+        self.assertEqual(
+            self.filtered_ids(actor=str(self.actor.id)),
+            [self.late.id, self.later.id],
+        )
+
+    def test_filter_by_min_available(self):
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.next_day,
+        )
+        Reservation.objects.create(ticket=ticket, user=self.user)
+
+        self.assertNotIn(self.next_day.id, self.filtered_ids(min_available=1))
+
+    def test_invalid_filter(self):
+        response = self.client.get(self.url, {"date": "20-12-2024"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def explain(self, **params):
+        view = PerformanceViewSet(action="list")
+        view.request = Request(APIRequestFactory().get(self.url, params))
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # tiny test tables would otherwise always be seq scanned
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            return view.get_queryset().explain()
+
+    def test_date_filter_uses_show_time_index(self):
+        self.assertIn(
+            "performance_show_time",
+            self.explain(date="2024-12-20"),
+        )
+
+    def test_play_date_filter_uses_composite_index(self):
+        self.assertIn(
+            "performance_play_show_time",
+            self.explain(play=str(self.hamlet.id), date="2024-12-20"),
+        )
+
+
+class PerformanceListQueryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_does_not_touch_tickets(self):
+        performance = create_sample_performance()
+        for seat in range(1, 4):
+            ticket = Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=performance,
+            )
+            Reservation.objects.create(ticket=ticket, user=self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("core:performance-list"))
+
+        # ETag lookup and one joined, annotated page query
+        self.assertEqual(len(context.captured_queries), 2)
+        page_sql = context.captured_queries[1]["sql"]
+        self.assertNotIn("core_ticket", page_sql)
+        self.assertNotIn("core_reservation", page_sql)
+        self.assertNotIn("DISTINCT", page_sql)
+        self.assertEqual(
+            response.data["results"][0]["available_seats"],
+            performance.theatre_hall.rows
+            * performance.theatre_hall.seats_in_row
+            - 3,
+        )
@@ -1,12 +1,20 @@
+import time
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Play, Actor, Genre
+from core.models import Play, Actor, Genre, SeatHold, Ticket
 from core.serializers import PlayListSerializer, PlayRetrieveSerializer
-from core.tests.config_for_tests import create_sample_plays
+from core.tests.config_for_tests import (
+    create_sample_plays,
+    create_sample_performance,
+)
 
 BASE_URL = reverse("core:play-list")
 
@@ -34,7 +42,7 @@ class AuthenticatedUserTest(TestCase):
             status.HTTP_200_OK
         )
         self.assertEqual(
-            response.data,
+            response.data["results"],
             serializer.data
         )
 
@@ -127,3 +135,113 @@ class AuthenticatedUserTest(TestCase):
             response.status_code,
             status.HTTP_204_NO_CONTENT
         )
+
+
+class PlayResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.play = create_sample_plays()
+
+    def test_play_list_served_from_cache(self):
+        first = self.client.get(BASE_URL)
+
+        # only the ETag lookup reaches the database
+        with self.assertNumQueries(1):
+            second = self.client.get(BASE_URL)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_play_update_invalidates_cache(self):
+        url = reverse("core:play-detail", args=[self.play.id])
+        self.client.get(url)
+
+        self.play.title = "Renamed"
+        self.play.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_expired_hold_ends_cached_play_detail(self):
+        performance = create_sample_performance(play=self.play)
+        ticket = Ticket.objects.create(
+            row=1, seat=1, performance=performance
+        )
+        SeatHold.objects.create(
+            ticket=ticket,
+            performance=performance,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(seconds=1),
+        )
+        url = reverse("core:play-detail", args=[self.play.id])
+        hall = performance.theatre_hall
+        seats = hall.rows * hall.seats_in_row
+
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["performances"][0]["available_seats"], seats - 1
+        )
+
+        # Expiry is not a write, no model version moves.
+        time.sleep(1.1)
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["performances"][0]["available_seats"], seats
+        )
+
+    def test_actor_added_invalidates_play_detail(self):
+        url = reverse("core:play-detail", args=[self.play.id])
+        self.client.get(url)
+
+        self.play.actors.add(
+            Actor.objects.create(first_name="Sponge", last_name="Bob")
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["actors"], ["Sponge Bob"])
+
+
+class PlayRetrieveQueriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.play = create_sample_plays()
+        self.play.actors.add(
+            Actor.objects.create(first_name="Sponge", last_name="Bob")
+        )
+        self.play.genres.add(Genre.objects.create(name="Sci-Fi"))
+        self.url = reverse("core:play-detail", args=[self.play.id])
+
+    def test_play_retrieve_query_count_is_constant(self):
+        # ETag lookup, play, actors, genres, annotated performances and
+        # the next seat hold expiry, for the cache timeout
+        for performances in (1, 10):
+            cache.clear()
+            for _ in range(performances):
+                create_sample_performance(play=self.play)
+
+            with self.assertNumQueries(6):
+                response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data["performances"]), 11)
+
+    def test_play_retrieve_performances_have_available_seats(self):
+        performance = create_sample_performance(play=self.play)
+
+        response = self.client.get(self.url)
+
+        hall = performance.theatre_hall
+        self.assertEqual(
+            response.data["performances"][0]["available_seats"],
+            hall.rows * hall.seats_in_row,
+        )
@@ -0,0 +1,107 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.profiling import Sampler
+from core.tests.config_for_tests import create_sample_performance
+
+
+def spin(stopped):
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+class SamplerTest(TestCase):
+    def test_collapsed_stacks(self):
+        stopped = threading.Event()
+        with Sampler(thread_ids={threading.get_ident()}) as sampler:
+            threading.Timer(0.2, stopped.set).start()
+            spin(stopped)
+
+        self.assertGreater(sampler.samples, 0)
+        lines = sampler.collapsed().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+        self.assertTrue(
+            any(
+                "core.tests.tests_profiling:spin" in line for line in lines
+            )
+        )
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        create_sample_performance()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            username="admin",
+            password="test-1-2-3",
+        )
+
+    @staticmethod
+    def client_for(user) -> APIClient:
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=(
+                f"Bearer {RefreshToken.for_user(user).access_token}"
+            )
+        )
+        return client
+
+    def test_profile_request(self):
+        response = self.client_for(self.admin).get(
+            reverse("core:performance-list"), {"__profile": "1"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertEqual(response["X-Profiled-Status"], "200")
+        self.assertIn("X-Profile-Samples", response)
+
+    def test_profile_request_staff_only(self):
+        response = self.client_for(self.user).get(
+            reverse("core:performance-list"), {"__profile": "1"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertNotIn("X-Profiled-Status", response)
+
+    def test_capture(self):
+        stopped = threading.Event()
+        thread = threading.Thread(target=spin, args=(stopped,))
+        thread.start()
+        try:
+            response = self.client_for(self.admin).post(
+                reverse("core:profile") + "?seconds=0.2"
+            )
+        finally:
+            stopped.set()
+            thread.join()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            "core.tests.tests_profiling:spin", response.content.decode()
+        )
+
+    def test_capture_seconds_validated(self):
+        response = self.client_for(self.admin).post(
+            reverse("core:profile") + "?seconds=600"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_capture_admin_only(self):
+        response = self.client_for(self.user).post(reverse("core:profile"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
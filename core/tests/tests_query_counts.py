@@ -0,0 +1,189 @@
+import difflib
+import re
+from datetime import timedelta
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    Actor,
+    Genre,
+    Ticket,
+    Reservation,
+    SeatHold,
+)
+from core.tests.config_for_tests import (
+    create_sample_plays,
+    create_sample_theatre,
+    create_sample_performance,
+)
+from core.urls import router
+from user.urls import urlpatterns as user_urlpatterns
+
+N = 3
+
+DUMMY_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+def core_routes() -> list:
+    """(url name, detail) for every GET route of the core router."""
+    routes = []
+    for prefix, viewset, basename in router.registry:
+        routes.append((f"core:{basename}-list", False))
+        routes.append((f"core:{basename}-detail", True))
+        for extra_action in viewset.get_extra_actions():
+            if "get" in extra_action.mapping:
+                routes.append(
+                    (f"core:{basename}-{extra_action.url_name}",
+                     extra_action.detail)
+                )
+    return routes
+
+
+def user_routes() -> list:
+    return [
+        (f"user:{pattern.name}", False)
+        for pattern in user_urlpatterns
+        if hasattr(pattern.callback.view_class, "get")
+    ]
+
+
+def normalize(sql: str) -> str:
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    return re.sub(r"IN \(\?(, \?)*\)", "IN (...)", sql)
+
+
+@override_settings(CACHES=DUMMY_CACHE)
+class QueryCountRegressionTest(TestCase):
+    """
+    Requests every GET route with N and then 10 x N rows of each
+    resource and fails when the number of queries grows with the data.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.numbers = count(1)
+
+        self.play = create_sample_plays()
+        self.performance = create_sample_performance(play=self.play)
+
+    def seed(self, rows: int) -> None:
+        for _ in range(rows):
+            number = next(self.numbers)
+
+            actor = Actor.objects.create(
+                first_name=f"First {number}",
+                last_name=f"Last {number}",
+            )
+            genre = Genre.objects.create(name=f"Genre {number}")
+            play = create_sample_plays(title=f"Play {number}")
+            for related_play in (play, self.play):
+                related_play.actors.add(actor)
+                related_play.genres.add(genre)
+
+            performance = create_sample_performance(
+                play=play,
+                theatre_hall=create_sample_theatre(name=f"Hall {number}"),
+            )
+            create_sample_performance(
+                play=self.play,
+                theatre_hall=performance.theatre_hall,
+            )
+
+            free, reserved, held = (
+                Ticket.objects.create(
+                    row=number,
+                    seat=seat,
+                    performance=performance,
+                )
+                for seat in (1, 2, 3)
+            )
+            Ticket.objects.create(
+                row=number,
+                seat=4,
+                performance=self.performance,
+            )
+            Reservation.objects.create(ticket=reserved, user=self.user)
+            SeatHold.objects.create(
+                ticket=held,
+                performance=performance,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=10),
+            )
+
+    def get_url(self, name: str, detail: bool) -> str:
+        if not detail:
+            return reverse(name)
+
+        basename = name.split(":")[1].rsplit("-", 1)[0]
+        targets = {
+            "play": self.play,
+            "theatrehall": self.performance.theatre_hall,
+            "ticket": Ticket.objects.filter(
+                reservations__isnull=True,
+                hold__isnull=True,
+            ).first(),
+            "reservation": Reservation.objects.first(),
+            "actor": Actor.objects.first(),
+            "genre": Genre.objects.first(),
+            "performance": self.performance,
+            "seathold": SeatHold.objects.first(),
+        }
+        for prefix, target in targets.items():
+            if basename == prefix or basename.startswith(f"{prefix}-"):
+                if name.endswith("-seat"):
+                    ticket = target.tickets.first()
+                    return reverse(
+                        name, args=[target.pk, ticket.row, ticket.seat]
+                    )
+                return reverse(name, args=[target.pk])
+        self.fail(f"No object to request for route {name}")
+
+    def capture(self, url: str) -> list:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {"page_size": 1000})
+        self.assertLess(response.status_code, 400, f"GET {url}")
+        return [query["sql"] for query in context.captured_queries]
+
+    def assertConstantQueries(self, routes) -> None:
+        self.seed(N)
+        small = {route: self.capture(self.get_url(*route)) for route in routes}
+
+        self.seed(9 * N)
+        for route in routes:
+            large = self.capture(self.get_url(*route))
+            if len(large) == len(small[route]):
+                continue
+
+            diff = "\n".join(
+                difflib.unified_diff(
+                    list(map(normalize, small[route])),
+                    list(map(normalize, large)),
+                    fromfile=f"{N} rows",
+                    tofile=f"{10 * N} rows",
+                    lineterm="",
+                )
+            )
+            self.fail(
+                f"{route[0]} ran {len(small[route])} queries with {N} rows "
+                f"but {len(large)} with {10 * N} rows:\n{diff}"
+            )
+
+    def test_core_routes(self):
+        self.assertConstantQueries(core_routes())
+
+    def test_user_routes(self):
+        self.assertConstantQueries(user_routes())
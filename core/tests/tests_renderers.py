@@ -0,0 +1,80 @@
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import renderers
+from core.models import Ticket
+from core.renderers import FastJSONRenderer
+from core.tests.config_for_tests import create_sample_performance
+
+
+class FastJSONRendererTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+
+    @skipIf(renderers.orjson is None, "orjson is not installed")
+    def test_same_body_as_json_renderer(self):
+        for name in ("performance-list", "play-list", "actor-list"):
+            response = self.client.get(reverse(f"core:{name}"))
+
+            self.assertEqual(
+                response.content, JSONRenderer().render(response.data), name
+            )
+
+    @skipIf(renderers.orjson is None, "orjson is not installed")
+    def test_float_differences(self):
+        self.assertEqual(FastJSONRenderer().render([1e16]), b"[1e16]")
+        self.assertEqual(
+            FastJSONRenderer().render([float("nan")]), b"[null]"
+        )
+
+    def test_fallback_without_orjson(self):
+        data = {"title": "Hamlet  ", "seats": [1, 2]}
+
+        with mock.patch.object(renderers, "orjson", None):
+            content = FastJSONRenderer().render(data)
+
+        self.assertEqual(content, JSONRenderer().render(data))
+
+    def test_indented_output(self):
+        data = {"title": "Hamlet"}
+
+        content = FastJSONRenderer().render(
+            data, "application/json; indent=4"
+        )
+
+        self.assertEqual(content, b'{\n    "title": "Hamlet"\n}')
+
+    def test_json_request_body(self):
+        ticket = Ticket.objects.create(
+            performance=self.performance, row=2, seat=3
+        )
+
+        response = self.client.post(
+            reverse("core:reservation-list"),
+            {"ticket": ticket.id},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_invalid_json_request_body(self):
+        response = self.client.post(
+            reverse("core:reservation-list"),
+            b'{"ticket": ',
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["detail"])
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ticket, Reservation, SeatHold, Performance
+from core.tests.config_for_tests import create_sample_performance
+
+BASE_URL = reverse("core:seathold-list")
+CHECKOUT_URL = reverse("core:seathold-checkout")
+
+
+class AuthenticatedUserTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            username="otheruser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = create_sample_performance()
+        self.tickets = [
+            Ticket.objects.create(row=1, seat=seat, performance=self.performance)
+            for seat in range(1, 4)
+        ]
+
+    def hold(self, ticket, user, minutes=10):
+        return SeatHold.objects.create(
+            ticket=ticket,
+            performance=self.performance,
+            user=user,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def test_hold_create(self):
+        payload = {"tickets": [self.tickets[0].id, self.tickets[1].id]}
+
+        response = self.client.post(BASE_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(SeatHold.objects.values_list("ticket_id", flat=True)),
+            {self.tickets[0].id, self.tickets[1].id},
+        )
+
+    def test_hold_taken_by_other_user(self):
+        self.hold(self.tickets[0], self.other_user)
+        payload = {"tickets": [self.tickets[0].id]}
+
+        response = self.client.post(BASE_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["unavailable"], [self.tickets[0].id])
+
+    def test_expired_hold_does_not_block(self):
+        self.hold(self.tickets[0], self.other_user, minutes=-1)
+        payload = {"tickets": [self.tickets[0].id]}
+
+        response = self.client.post(BASE_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_held_seats_excluded_from_availability(self):
+        self.hold(self.tickets[0], self.other_user)
+
+        tickets = self.client.get(reverse("core:ticket-list"))
+        performances = self.client.get(reverse("core:performance-list"))
+
+        self.assertNotIn(
+            self.tickets[0].id,
+            [ticket["id"] for ticket in tickets.data["results"]],
+        )
+        hall = self.performance.theatre_hall
+        self.assertEqual(
+            performances.data["results"][0]["available_seats"],
+            hall.rows * hall.seats_in_row - 1,
+        )
+
+    def test_reservation_of_held_ticket_forbidden(self):
+        self.hold(self.tickets[0], self.other_user)
+
+        response = self.client.post(
+            reverse("core:reservation-list"),
+            {"ticket": self.tickets[0].id},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_checkout(self):
+        self.hold(self.tickets[0], self.user)
+        self.hold(self.tickets[1], self.user)
+
+        response = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Reservation.objects.filter(user=self.user).count(),
+            2
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(
+            Performance.objects.get().reserved_seats,
+            2
+        )
+
+    def test_checkout_expired_hold(self):
+        hold = self.hold(self.tickets[0], self.user, minutes=-1)
+
+        response = self.client.post(
+            CHECKOUT_URL,
+            {"holds": [hold.id]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_checkout_reserved_ticket(self):
+        Reservation.objects.create(
+            ticket=self.tickets[0], user=self.other_user
+        )
+        hold = self.hold(self.tickets[0], self.user)
+        self.hold(self.tickets[1], self.user)
+
+        response = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["unavailable"], [hold.id])
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+
+    def test_checkout_racing_reservation_conflicts(self):
+        Reservation.objects.create(
+            ticket=self.tickets[0], user=self.other_user
+        )
+        self.hold(self.tickets[0], self.user)
+        # What a checkout that locked the ticket before that commit sees.
+        Ticket.objects.update(is_reserved=False)
+
+        response = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["detail"].code, "ticket_already_reserved"
+        )
+
+    def test_expire_seat_holds_command(self):
+        self.hold(self.tickets[0], self.user, minutes=-1)
+        self.hold(self.tickets[1], self.user)
+
+        call_command("expire_seat_holds", stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("ticket_id", flat=True)),
+            [self.tickets[1].id],
+        )
@@ -0,0 +1,74 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from core.models import Performance, Play, Reservation, Ticket
+
+
+class SeedTheatreTest(TestCase):
+    def seed(self, *args, seed: int = 1) -> None:
+        call_command(
+            "seed_theatre",
+            *args,
+            plays=3,
+            halls=2,
+            performances_per_play=2,
+            occupancy=0.5,
+            users=4,
+            seed=seed,
+            start_date=date(2025, 1, 1),
+            stdout=StringIO(),
+        )
+
+    @staticmethod
+    def snapshot() -> list:
+        return list(
+            Reservation.objects.order_by(
+                "ticket__performance__show_time",
+                "ticket__performance__play__title",
+                "ticket__row",
+                "ticket__seat",
+            ).values_list(
+                "ticket__performance__play__title",
+                "ticket__performance__theatre_hall__name",
+                "ticket__performance__show_time",
+                "ticket__row",
+                "ticket__seat",
+                "user__username",
+            )
+        )
+
+    def test_seed_creates_consistent_theatre(self):
+        self.seed()
+
+        self.assertEqual(Play.objects.count(), 3)
+        self.assertEqual(Performance.objects.count(), 6)
+        for performance in Performance.objects.select_related("theatre_hall"):
+            hall = performance.theatre_hall
+            capacity = hall.rows * hall.seats_in_row
+            self.assertEqual(performance.tickets.count(), capacity)
+            self.assertEqual(performance.reserved_seats, round(capacity / 2))
+        self.assertEqual(
+            Ticket.objects.filter(is_reserved=True).count(),
+            Reservation.objects.count(),
+        )
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def test_seed_is_deterministic(self):
+        self.seed()
+        first = self.snapshot()
+
+        self.seed("--flush")
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seed_twice_without_flush(self):
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        self.seed(seed=2)
+        self.assertEqual(Play.objects.count(), 6)
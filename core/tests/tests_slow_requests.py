@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import SlowRequest
+from core.tests.config_for_tests import create_sample_performance
+
+
+@override_settings(SLOW_REQUEST_THRESHOLD_MS=0, SLOW_REQUEST_LIMIT=2)
+class SlowRequestTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        create_sample_performance()
+
+    def test_slow_request_recorded(self):
+        response = self.client.get(
+            reverse("core:performance-list"), {"date": "2024-11-30"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slow_request = SlowRequest.objects.get()
+        self.assertEqual(slow_request.method, "GET")
+        self.assertEqual(slow_request.route, "core:performance-list")
+        self.assertIn("date=2024-11-30", slow_request.path)
+        self.assertEqual(slow_request.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            slow_request.query_count, len(slow_request.queries)
+        )
+        self.assertTrue(
+            any(
+                "core_performance" in query["sql"]
+                for query in slow_request.queries
+            )
+        )
+        self.assertTrue(slow_request.explain_sql.startswith("EXPLAIN"))
+        self.assertNotEqual(slow_request.plan, "")
+        self.assertNotIn("EXPLAIN failed", slow_request.plan)
+
+    def test_only_latest_kept(self):
+        for url in ("play-list", "actor-list", "genre-list"):
+            self.client.get(reverse(f"core:{url}"))
+
+        self.assertEqual(
+            list(SlowRequest.objects.values_list("route", flat=True)),
+            ["core:genre-list", "core:actor-list"],
+        )
+
+    def test_user_routes_ignored(self):
+        APIClient().post(
+            reverse("user:token_obtain_pair"),
+            {"username": "testuser", "password": "test-1-2-3"},
+        )
+
+        self.assertFalse(SlowRequest.objects.exists())
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=60_000)
+    def test_fast_requests_ignored(self):
+        self.client.get(reverse("core:performance-list"))
+
+        self.assertFalse(SlowRequest.objects.exists())
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=None)
+    def test_disabled(self):
+        self.client.get(reverse("core:performance-list"))
+
+        self.assertFalse(SlowRequest.objects.exists())
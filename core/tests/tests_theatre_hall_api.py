@@ -37,7 +37,7 @@ class AuthenticatedUserTest(TestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_theatre_hall_detail(self):
         theatre_hall = TheatreHall.objects.create(
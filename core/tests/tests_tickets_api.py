@@ -1,15 +1,18 @@
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from core.models import Ticket
+from core.models import Ticket, Reservation
 from core.serializers import (
     TicketListSerializer,
     TicketRetrieveSerializer
 )
 from core.tests.config_for_tests import create_sample_performance
+from core.views import TicketViewSet
 
 
 class AuthenticatedUserTest(TestCase):
@@ -37,7 +40,7 @@ class AuthenticatedUserTest(TestCase):
         serializer = TicketListSerializer(tickets, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_ticket_detail(self):
         ticket = Ticket.objects.create(
@@ -95,3 +98,108 @@ class AuthenticatedUserTest(TestCase):
         url = reverse("core:ticket-detail", kwargs={"pk": ticket.pk})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class AvailableTicketsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="test-1-2-3",
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("core:ticket-list")
+
+        self.performance = create_sample_performance()
+        self.other_performance = create_sample_performance(
+            theatre_hall=self.performance.theatre_hall,
+        )
+        self.ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+        )
+        self.other_ticket = Ticket.objects.create(
+            row=1,
+            seat=2,
+            performance=self.other_performance,
+        )
+
+    def listed_ids(self, **params) -> list:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ticket["id"] for ticket in response.data["results"]]
+
+    def test_reservation_flags_ticket(self):
+        reservation = Reservation.objects.create(
+            ticket=self.ticket,
+            user=self.user,
+        )
+        self.ticket.refresh_from_db()
+        self.assertTrue(self.ticket.is_reserved)
+        self.assertNotIn(self.ticket.id, self.listed_ids())
+
+        reservation.delete()
+        self.ticket.refresh_from_db()
+        self.assertFalse(self.ticket.is_reserved)
+        self.assertIn(self.ticket.id, self.listed_ids())
+
+    def test_moving_reservation_flags_both_tickets(self):
+        reservation = Reservation.objects.create(
+            ticket=self.ticket,
+            user=self.user,
+        )
+        reservation.ticket = self.other_ticket
+        reservation.save()
+
+        self.ticket.refresh_from_db()
+        self.other_ticket.refresh_from_db()
+        self.assertFalse(self.ticket.is_reserved)
+        self.assertTrue(self.other_ticket.is_reserved)
+
+    def test_bulk_reservation_flags_tickets(self):
+        Reservation.reserve_tickets(self.user, [self.ticket.id])
+
+        self.ticket.refresh_from_db()
+        self.assertTrue(self.ticket.is_reserved)
+
+    def test_filter_by_performance(self):
+        self.assertEqual(
+            self.listed_ids(performance=str(self.performance.id)),
+            [self.ticket.id],
+        )
+
+    def test_invalid_performance_filter(self):
+        response = self.client.get(self.url, {"performance": "one"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_available_filter_uses_partial_index(self):
+        # a sold out majority is what makes the partial index worth it
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=row,
+                seat=1,
+                performance=self.performance,
+                is_reserved=True,
+            )
+            for row in range(2, 200)
+        )
+        view = TicketViewSet(action="list")
+        view.request = Request(
+            APIRequestFactory().get(
+                self.url, {"performance": str(self.performance.id)}
+            )
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    # tiny test tables would otherwise always be seq scanned
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                else:
+                    # SQLite only considers the partial index with stats
+                    cursor.execute("ANALYZE")
+            plan = view.get_queryset().explain()
+
+        self.assertIn("ticket_available_seats", plan)
@@ -9,6 +9,9 @@ from core.views import (
     ActorViewSet,
     GenreViewSet,
     PerformanceViewSet,
+    SeatHoldViewSet,
+    MetricsView,
+    ProfileView,
 )
 
 app_name = "core"
@@ -21,7 +24,10 @@ router.register("reservations", ReservationViewSet)
 router.register("actors", ActorViewSet)
 router.register("genres", GenreViewSet)
 router.register("performances", PerformanceViewSet)
+router.register("seat-holds", SeatHoldViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("profile/", ProfileView.as_view(), name="profile"),
 ]
@@ -1,9 +1,21 @@
-from django.db.models import Count, F
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import HttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter
 )
-from rest_framework import viewsets
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.models import (
     TheatreHall,
@@ -13,6 +25,7 @@ from core.models import (
     Genre,
     Ticket,
     Reservation,
+    SeatHold,
 )
 
 from core.serializers import (
@@ -31,9 +44,25 @@ from core.serializers import (
     PlayRetrieveSerializer,
     TheatreHallRetrieveSerializer,
     TicketRetrieveSerializer,
+    TicketSeatSerializer,
     PerformanceRetrieveSerializer,
     ReservationRetrieveSerializer,
+    ReservationBulkSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldCheckoutSerializer,
+)
+from core.cache import CachedResponseMixin, ConditionalGetMixin
+from core.fast_list import FastListMixin
+from core.fieldsets import FieldsetMixin
+from core.metrics import ServerTimingMixin, render_metrics
+from core.profiling import MAX_CAPTURE_SECONDS, capture
+from core.pagination import (
+    PerformancePagination,
+    TicketPagination,
+    ReservationPagination,
 )
+from core.seat_map import ENCODINGS, build_seat_grid, encode_seat_grid
 
 from user.permissions import (
     IsAdminOrIfAuthenticatedReadOnly,
@@ -41,43 +70,119 @@ from user.permissions import (
 )
 
 
-class PerformanceViewSet(viewsets.ModelViewSet):
+def params_to_ints(value: str, name: str) -> list:
+    try:
+        return [int(str_id) for str_id in value.split(",")]
+    except ValueError:
+        raise ValidationError({name: "Expected comma separated integers."})
+
+
+def param_to_date(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: "Expected a date as YYYY-MM-DD."})
+
+
+class PerformanceViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    FieldsetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Performance.objects.all()
     serializer_class = PerformanceSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = PerformancePagination
+    response_models = (Performance, Play, TheatreHall, Reservation, SeatHold)
 
     def get_serializer_class(self):
         if self.action == "list":
             return PerformanceListSerializer
         elif self.action == "retrieve":
             return PerformanceRetrieveSerializer
+        elif self.action == "seat":
+            return TicketSeatSerializer
 
         return PerformanceSerializer
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.select_related("play", "theatre_hall")
 
         if self.action == "list":
-            queryset = queryset.prefetch_related(
-                "play",
-                "theatre_hall",
-                "tickets",
-            ).annotate(
-                available_seats=F("theatre_hall__rows")
-                                * F("theatre_hall__seats_in_row")
-                                - Count("tickets__reservations")
-            )
-        play = self.request.query_params.get("play", None)
-        date = self.request.query_params.get("date", None)
+            queryset = queryset.with_available_seats()
+
+        params = self.request.query_params
+        play = params.get("play", None)
+        date = params.get("date", None)
+        date_from = params.get("date_from", None)
+        date_to = params.get("date_to", None)
+        hall = params.get("hall", None)
+        genre = params.get("genre", None)
+        actor = params.get("actor", None)
+        min_available = params.get("min_available", None)
 
         if play:
-            play_ids = [int(str_id) for str_id in play.split(",")]
-            queryset = queryset.filter(play_id__in=play_ids)
+            queryset = queryset.filter(
+                play_id__in=params_to_ints(play, "play")
+            )
+
+        if hall:
+            queryset = queryset.filter(
+                theatre_hall_id__in=params_to_ints(hall, "hall")
+            )
+
+        if genre:
+            queryset = queryset.filter(
+                play__in=Play.objects.filter(
+                    genres__id__in=params_to_ints(genre, "genre")
+                )
+            )
 
+        if actor:
+            queryset = queryset.filter(
+                play__in=Play.objects.filter(
+                    actors__id__in=params_to_ints(actor, "actor")
+                )
+            )
+
+        # Half-open show_time ranges instead of show_time__date, which
+        # casts the column to a local date and can't use an index.
         if date:
-            queryset = queryset.filter(show_time__date=date)
+            day = param_to_date(date, "date")
+            queryset = queryset.filter(
+                show_time__gte=self._day_start(day),
+                show_time__lt=self._day_start(day + timedelta(days=1)),
+            )
+
+        if date_from:
+            day = param_to_date(date_from, "date_from")
+            queryset = queryset.filter(show_time__gte=self._day_start(day))
+
+        if date_to:
+            day = param_to_date(date_to, "date_to")
+            queryset = queryset.filter(
+                show_time__lt=self._day_start(day + timedelta(days=1))
+            )
+
+        if min_available:
+            if "available_seats" not in queryset.query.annotations:
+                queryset = queryset.with_available_seats()
+            queryset = queryset.filter(
+                available_seats__gte=params_to_ints(
+                    min_available, "min_available"
+                )[0]
+            )
 
-        return queryset.distinct()
+        return queryset
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        return timezone.make_aware(
+            datetime.combine(day, time.min),
+            timezone.get_default_timezone(),
+        )
 
     @extend_schema(
         parameters=[
@@ -91,16 +196,166 @@ class PerformanceViewSet(viewsets.ModelViewSet):
                 type={"type": "string"},
                 description="Filter performance by date, Example:(?date=2024-12-20)",
             ),
+            OpenApiParameter(
+                "date_from",
+                type={"type": "string"},
+                description="Performances on or after a date, "
+                            "Example:(?date_from=2024-12-20)",
+            ),
+            OpenApiParameter(
+                "date_to",
+                type={"type": "string"},
+                description="Performances on or before a date, "
+                            "Example:(?date_to=2024-12-31)",
+            ),
+            OpenApiParameter(
+                "hall",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Filter performance by theatre hall id, "
+                            "Example:(?hall=1,2)",
+            ),
+            OpenApiParameter(
+                "genre",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Filter performance by genre id of the play, "
+                            "Example:(?genre=1,2)",
+            ),
+            OpenApiParameter(
+                "actor",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Filter performance by actor id of the play, "
+                            "Example:(?actor=1,2)",
+            ),
+            OpenApiParameter(
+                "min_available",
+                type={"type": "number"},
+                description="Performances with at least this many "
+                            "available seats, Example:(?min_available=2)",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type={"type": "string", "enum": [*ENCODINGS]},
+                description="Seat map encoding: base64 bitset (default), "
+                            "run-length encoded [value, length] pairs "
+                            "or a JSON grid. Seats are row-major, "
+                            "1 marks a seat that cannot be booked "
+                            "(no ticket, reserved or held).",
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=True, methods=["get"], url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        encoding = request.query_params.get("encoding", "bitset")
+        if encoding not in ENCODINGS:
+            raise ValidationError(
+                {"encoding": f"encoding must be one of {', '.join(ENCODINGS)}"}
+            )
+
+        performance = self.get_object()
+        hall = performance.theatre_hall
+
+        free_seats = (
+            Ticket.objects.filter(performance=performance, is_reserved=False)
+            .exclude(
+                Exists(SeatHold.objects.active().filter(ticket=OuterRef("pk")))
+            )
+            .values_list("row", "seat")
+        )
+        grid = build_seat_grid(hall.rows, hall.seats_in_row, free_seats)
+
+        return Response(
+            {
+                "performance": performance.id,
+                "rows": hall.rows,
+                "seats_in_row": hall.seats_in_row,
+                "encoding": encoding,
+                "seats": encode_seat_grid(grid, hall.seats_in_row, encoding),
+            }
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"seats/(?P<row>\d+)/(?P<seat>\d+)",
+    )
+    def seat(self, request, pk=None, row=None, seat=None):
+        ticket = get_object_or_404(
+            Ticket.objects.annotate(
+                held=Exists(
+                    SeatHold.objects.active().filter(ticket=OuterRef("pk"))
+                )
+            ),
+            performance_id=pk,
+            row=row,
+            seat=seat,
+        )
+        ticket.available = not (ticket.is_reserved or ticket.held)
+
+        return Response(self.get_serializer(ticket).data)
+
+    @extend_schema(request=None, responses={201: OpenApiTypes.OBJECT})
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="generate-tickets",
+        permission_classes=[IsAdminUser],
+    )
+    def generate_tickets(self, request, pk=None):
+        performance = self.get_object()
+        created = performance.generate_tickets()
+
+        return Response({"created": created}, status=status.HTTP_201_CREATED)
 
-class PlayViewSet(viewsets.ModelViewSet):
+
+class PlayViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = PlaySerializer
     queryset = Play.objects.all()
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    response_models = (Play,)
+
+    def get_response_models(self):
+        if self.action == "retrieve":
+            return (
+                Play,
+                Actor,
+                Genre,
+                Performance,
+                TheatreHall,
+                Reservation,
+                SeatHold,
+            )
+        return self.response_models
+
+    def get_queryset(self):
+        queryset = self.queryset
+
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                "actors",
+                "genres",
+                Prefetch(
+                    "performances",
+                    queryset=Performance.objects.select_related(
+                        "theatre_hall"
+                    ).with_available_seats(),
+                ),
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -111,10 +366,17 @@ class PlayViewSet(viewsets.ModelViewSet):
         return PlaySerializer
 
 
-class TheatreHallViewSet(viewsets.ModelViewSet):
+class TheatreHallViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    response_models = (TheatreHall,)
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -122,10 +384,21 @@ class TheatreHallViewSet(viewsets.ModelViewSet):
         return TheatreHallSerializer
 
 
-class ActorViewSet(viewsets.ModelViewSet):
-    queryset = Actor.objects.prefetch_related("plays")
+class ActorViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldsetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
+    # Plays in id order, as the fast list path fetches them.
+    queryset = Actor.objects.prefetch_related(
+        Prefetch("plays", queryset=Play.objects.order_by("id"))
+    )
     serializer_class = ActorSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    response_models = (Actor, Play)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -133,16 +406,38 @@ class ActorViewSet(viewsets.ModelViewSet):
         return ActorSerializer
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    response_models = (Genre,)
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    FieldsetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     permission_classes = [IsAdminOrIfAuthenticatedReadOnly]
+    pagination_class = TicketPagination
+    response_models = (
+        Ticket,
+        Reservation,
+        SeatHold,
+        Performance,
+        Play,
+        TheatreHall,
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -153,19 +448,50 @@ class TicketViewSet(viewsets.ModelViewSet):
         return TicketSerializer
 
     def get_queryset(self):
-        queryset = Ticket.objects.prefetch_related(
-            "reservations",
-            "performance"
+        # is_reserved is kept in step with the reservation table, so the
+        # partial "ticket_available_seats" index covers this filter and
+        # holds are checked with NOT EXISTS instead of a join + DISTINCT.
+        queryset = Ticket.objects.select_related(
+            "performance__play",
+            "performance__theatre_hall",
+        ).filter(is_reserved=False)
+        queryset = queryset.exclude(
+            Exists(SeatHold.objects.active().filter(ticket=OuterRef("pk")))
         )
-        queryset = queryset.exclude(reservations__isnull=False)
 
-        return queryset.distinct()
+        performance = self.request.query_params.get("performance")
+        if performance:
+            queryset = queryset.filter(
+                performance_id__in=params_to_ints(performance, "performance")
+            )
 
+        return queryset
 
-class ReservationViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "performance",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Available tickets of a performance, "
+                            "Example:(?performance=1,2)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class ReservationViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Reservation.objects.all().select_related("ticket")
     serializer_class = ReservationSerializer
     permission_classes = [IsAdminOrIfAuthenticatedCreateAndReadAndDelete]
+    pagination_class = ReservationPagination
+    response_models = (Reservation,)
 
     def get_queryset(self):
         return Reservation.objects.filter(
@@ -173,13 +499,138 @@ class ReservationViewSet(viewsets.ModelViewSet):
             ticket__isnull=False
         )
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
     def get_serializer_class(self):
         if self.action == "list":
             return ReservationListSerializer
         elif self.action == "retrieve":
             return ReservationRetrieveSerializer
+        elif self.action == "bulk":
+            return ReservationBulkSerializer
 
         return ReservationSerializer
+
+    @extend_schema(responses={201: ReservationSerializer(many=True)})
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservations = serializer.save(user=request.user)
+
+        return Response(
+            ReservationSerializer(reservations, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class SeatHoldViewSet(
+    ServerTimingMixin,
+    ConditionalGetMixin,
+    FieldsetMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    response_models = (SeatHold,)
+
+    def get_queryset(self):
+        return SeatHold.objects.active().filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        elif self.action == "checkout":
+            return SeatHoldCheckoutSerializer
+
+        return SeatHoldSerializer
+
+    @extend_schema(responses={201: SeatHoldSerializer(many=True)})
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(responses={201: ReservationSerializer(many=True)})
+    @action(detail=False, methods=["post"])
+    def checkout(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservations = serializer.save(user=request.user)
+
+        return Response(
+            ReservationSerializer(reservations, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class MetricsView(APIView):
+    """Request histograms in the Prometheus text exposition format"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses={200: OpenApiTypes.STR})
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class ProfileView(APIView):
+    """
+    Sample every thread of this worker process for a number of seconds
+    and return the collapsed stacks. Only other threads of the same
+    process are seen, so this is useful with threaded workers.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "seconds",
+                type=OpenApiTypes.NUMBER,
+                description=(
+                    "How long to sample for, "
+                    f"up to {MAX_CAPTURE_SECONDS} (ex. ?seconds=10)"
+                ),
+            ),
+        ],
+        request=None,
+        responses={200: OpenApiTypes.STR},
+    )
+    def post(self, request):
+        try:
+            seconds = float(request.query_params.get("seconds", 10))
+        except ValueError:
+            raise ValidationError({"seconds": "Must be a number."})
+        if not 0 < seconds <= MAX_CAPTURE_SECONDS:
+            raise ValidationError(
+                {
+                    "seconds": (
+                        f"Must be between 0 and {MAX_CAPTURE_SECONDS}."
+                    )
+                }
+            )
+
+        sampler = capture(seconds)
+        response = HttpResponse(
+            sampler.collapsed(), content_type="text/plain; charset=utf-8"
+        )
+        response["X-Profile-Samples"] = sampler.samples
+        return response
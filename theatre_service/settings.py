@@ -27,20 +27,34 @@ INSTALLED_APPS = [
     "django_extensions",
     "core",
     "user",
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "core.middleware.SlowRequestMiddleware",
+    "core.middleware.RequestMetricsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.ProfilingMiddleware",
 ]
 
+# The toolbar instruments every request, so it is only wired in for
+# development: with DEBUG on, unless DEBUG_TOOLBAR says otherwise.
+DEBUG_TOOLBAR = os.getenv(
+    "DEBUG_TOOLBAR", str(DEBUG)
+).lower() in ("1", "true")
+
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("core.middleware.RequestMetricsMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -76,6 +90,34 @@ DATABASES = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+}
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Server-Timing headers and the Prometheus histograms at
+# /theatre/api/metrics/, see core.middleware.RequestMetricsMiddleware.
+REQUEST_METRICS_ENABLED = os.getenv(
+    "REQUEST_METRICS_ENABLED", ""
+).lower() in ("1", "true")
+
+# Requests to the core API slower than this many milliseconds are kept,
+# with their SQL and a plan of the slowest query, in the last
+# SLOW_REQUEST_LIMIT SlowRequest rows. Off when unset.
+SLOW_REQUEST_THRESHOLD_MS = (
+    float(os.environ["SLOW_REQUEST_THRESHOLD_MS"])
+    if os.getenv("SLOW_REQUEST_THRESHOLD_MS")
+    else None
+)
+SLOW_REQUEST_LIMIT = int(os.getenv("SLOW_REQUEST_LIMIT", "100"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -111,18 +153,32 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_SCHEMA_CLASS": "core.schema.AutoSchema",
+    # orjson based, plain json when orjson is not installed.
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle"
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "50/day",
-        "user": "1000/day"
+        "anon": os.getenv("THROTTLE_ANON_RATE", "50/day"),
+        "user": os.getenv("THROTTLE_USER_RATE", "1000/day"),
     }
 }
 
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=90),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
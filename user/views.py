@@ -1,15 +1,29 @@
 from rest_framework import generics, permissions
+from rest_framework_simplejwt import views as jwt_views
 
+from core.metrics import ServerTimingMixin
 from user.serializers import UserSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ServerTimingMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = ()
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ServerTimingMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
 
     def get_object(self):
         return self.request.user
+
+
+class TokenObtainPairView(ServerTimingMixin, jwt_views.TokenObtainPairView):
+    pass
+
+
+class TokenRefreshView(ServerTimingMixin, jwt_views.TokenRefreshView):
+    pass
+
+
+class TokenVerifyView(ServerTimingMixin, jwt_views.TokenVerifyView):
+    pass